@@ -32,4 +32,95 @@ def eth_aggregate_pubkeys(pubkeys: Sequence[BLSPubkey]) -> BLSPubkey:
 '''
 
 
+OPTIMIZED_APPLY_DEPOSIT = '''
+def apply_deposit(state: BeaconState,
+                  pubkey: BLSPubkey,
+                  withdrawal_credentials: Bytes32,
+                  amount: uint64,
+                  signature: BLSSignature) -> None:
+    index = get_validator_index_by_pubkey(state, pubkey)
+    if index is None:
+        # Verify the deposit signature (proof of possession) which is not checked by the deposit contract
+        deposit_message = DepositMessage(
+            pubkey=pubkey,
+            withdrawal_credentials=withdrawal_credentials,
+            amount=amount,
+        )
+        domain = compute_domain(DOMAIN_DEPOSIT)  # Fork-agnostic domain since deposits are valid across forks
+        signing_root = compute_signing_root(deposit_message, domain)
+        if bls.Verify(pubkey, signing_root, signature):
+            add_validator_to_registry(state, pubkey, withdrawal_credentials, amount)
+    else:
+        # Increase balance by deposit amount
+        increase_balance(state, index, amount)
+'''
+
+OPTIMIZED_GET_PARTICIPATION_DELTAS = '''
+def get_participation_deltas(state: BeaconState) -> Sequence[Tuple[Sequence[Gwei], Sequence[Gwei]]]:
+    """
+    Return the deltas of each participation flag, as ``get_flag_index_deltas``,
+    followed by the inactivity penalty deltas, as ``get_inactivity_penalty_deltas``.
+    The registry is swept once, participation is checked with the flag bits instead of index sets.
+    """
+    previous_epoch = get_previous_epoch(state)
+    participation = state.previous_epoch_participation.encode_bytes()
+    # Flag bits of the eligible validators, zero for the slashed ones
+    eligible: PyList[Tuple[int, Gwei, int]] = []
+    participating_balances = [Gwei(0)] * len(PARTICIPATION_FLAG_WEIGHTS)
+    for index, validator in enumerate(state.validators.readonly_iter()):
+        is_active = is_active_validator(validator, previous_epoch)
+        if is_active or (validator.slashed and previous_epoch + 1 < validator.withdrawable_epoch):
+            flags = participation[index] if is_active and not validator.slashed else 0
+            eligible.append((index, validator.effective_balance, flags))
+            for flag_index in range(len(PARTICIPATION_FLAG_WEIGHTS)):
+                if flags & (1 << flag_index):
+                    participating_balances[flag_index] += validator.effective_balance
+
+    participating_increments = [
+        max(EFFECTIVE_BALANCE_INCREMENT, balance) // EFFECTIVE_BALANCE_INCREMENT
+        for balance in participating_balances
+    ]
+    active_increments = get_total_active_balance(state) // EFFECTIVE_BALANCE_INCREMENT
+    base_reward_per_increment = get_base_reward_per_increment(state)
+    is_leaking = is_in_inactivity_leak(state)
+    deltas = [
+        ([Gwei(0)] * len(state.validators), [Gwei(0)] * len(state.validators))
+        for _ in range(len(PARTICIPATION_FLAG_WEIGHTS) + 1)
+    ]
+    for index, effective_balance, flags in eligible:
+        base_reward = effective_balance // EFFECTIVE_BALANCE_INCREMENT * base_reward_per_increment
+        for flag_index, weight in enumerate(PARTICIPATION_FLAG_WEIGHTS):
+            rewards, penalties = deltas[flag_index]
+            if flags & (1 << flag_index):
+                if not is_leaking:
+                    reward_numerator = base_reward * weight * participating_increments[flag_index]
+                    rewards[index] = Gwei(reward_numerator // (active_increments * WEIGHT_DENOMINATOR))
+            elif flag_index != TIMELY_HEAD_FLAG_INDEX:
+                penalties[index] = Gwei(base_reward * weight // WEIGHT_DENOMINATOR)
+        if not flags & (1 << TIMELY_TARGET_FLAG_INDEX):
+            penalty_numerator = effective_balance * state.inactivity_scores[index]
+            penalty_denominator = INACTIVITY_SCORE_BIAS * INACTIVITY_PENALTY_QUOTIENT_ALTAIR
+            deltas[-1][1][index] = Gwei(penalty_numerator // penalty_denominator)
+    return deltas
+'''
+
+
+OPTIMIZED_PROCESS_REWARDS_AND_PENALTIES = '''
+def process_rewards_and_penalties(state: BeaconState) -> None:
+    # No rewards are applied at the end of `GENESIS_EPOCH` because rewards are for work done in the previous epoch
+    if get_current_epoch(state) == GENESIS_EPOCH:
+        return
+
+    deltas = get_participation_deltas(state)
+    for index in range(len(state.validators)):
+        # Same as `increase_balance` then `decrease_balance` for each of the deltas, with a single balance write
+        balance = state.balances[index]
+        for (rewards, penalties) in deltas:
+            balance += rewards[index]
+            balance = Gwei(0) if penalties[index] > balance else balance - penalties[index]
+        if balance != state.balances[index]:
+            state.balances[index] = balance
+'''
+
+
 ETH2_SPEC_COMMENT_PREFIX = "eth2spec:"
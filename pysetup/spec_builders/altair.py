@@ -1,7 +1,12 @@
 from typing import Dict
 
-from .base import BaseSpecBuilder
-from ..constants import ALTAIR, OPTIMIZED_BLS_AGGREGATE_PUBKEYS
+from .base import BaseSpecBuilder, replace_source
+from ..constants import (
+    ALTAIR,
+    OPTIMIZED_BLS_AGGREGATE_PUBKEYS,
+    OPTIMIZED_GET_PARTICIPATION_DELTAS,
+    OPTIMIZED_PROCESS_REWARDS_AND_PENALTIES,
+)
 
 
 class AltairSpecBuilder(BaseSpecBuilder):
@@ -36,7 +41,63 @@ def get_generalized_index(ssz_class: Any, *path: PyUnion[int, SSZVariableName])
 
 def compute_merkle_proof(object: SSZObject,
                          index: GeneralizedIndex) -> Sequence[Bytes32]:
-    return build_proof(object.get_backing(), index)'''
+    return build_proof(object.get_backing(), index)
+
+
+# Decompressed pubkeys and aggregate pubkey of each sync committee, by committee root and BLS backend
+sync_committee_pubkey_cache = LRU(size=4)
+
+
+def get_sync_committee_pubkey_points(sync_committee: SyncCommittee) -> Optional[Tuple[Sequence[Any], Any]]:
+    """
+    Return the decompressed pubkeys of ``sync_committee`` and their aggregate, ``None`` if a pubkey is invalid.
+    """
+    key = (hash_tree_root(sync_committee), bls.bls)
+    if key not in sync_committee_pubkey_cache:
+        if bls.KeyValidateMultiple(sync_committee.pubkeys):
+            sync_committee_pubkey_cache[key] = (
+                [bls.bytes48_to_G1(pubkey) for pubkey in sync_committee.pubkeys],
+                bls.bytes48_to_G1(eth_aggregate_pubkeys(sync_committee.pubkeys)),
+            )
+        else:
+            sync_committee_pubkey_cache[key] = None
+    return sync_committee_pubkey_cache[key]
+
+
+def is_valid_sync_committee_signature(sync_committee: SyncCommittee,
+                                      sync_committee_bits: Bitvector[SYNC_COMMITTEE_SIZE],
+                                      signing_root: Root,
+                                      signature: BLSSignature) -> bool:
+    """
+    Check ``signature`` as ``eth_fast_aggregate_verify`` over the pubkeys of the participants.
+    The participant aggregate is built from cached points, subtracting the absent members
+    from the committee aggregate when most members participate.
+    """
+    points = get_sync_committee_pubkey_points(sync_committee) if bls.bls_active else None
+    if points is None or not any(sync_committee_bits):
+        participant_pubkeys = [
+            pubkey for pubkey, bit in zip(sync_committee.pubkeys, sync_committee_bits) if bit
+        ]
+        return eth_fast_aggregate_verify(participant_pubkeys, signing_root, signature)
+
+    pubkey_points, aggregate = points
+    absent_points = [point for point, bit in zip(pubkey_points, sync_committee_bits) if not bit]
+    if len(absent_points) * 2 < len(pubkey_points):
+        for point in absent_points:
+            aggregate = bls.add(aggregate, bls.neg(point))
+    else:
+        aggregate = bls.Z1()
+        for point, bit in zip(pubkey_points, sync_committee_bits):
+            if bit:
+                aggregate = bls.add(aggregate, point)
+    participant_aggregate_pubkey = bls.G1_to_bytes48(aggregate)
+    if participant_aggregate_pubkey == bls.G1_to_bytes48(bls.Z1()):
+        # The participants cancel out, leave that case to the reference
+        participant_pubkeys = [
+            pubkey for pubkey, bit in zip(sync_committee.pubkeys, sync_committee_bits) if bit
+        ]
+        return eth_fast_aggregate_verify(participant_pubkeys, signing_root, signature)
+    return bls.Verify(participant_aggregate_pubkey, signing_root, signature)'''
 
 
     @classmethod
@@ -51,4 +112,36 @@ def compute_merkle_proof(object: SSZObject,
     def implement_optimizations(cls, functions: Dict[str, str]) -> Dict[str, str]:
         if "eth_aggregate_pubkeys" in functions:
             functions["eth_aggregate_pubkeys"] = OPTIMIZED_BLS_AGGREGATE_PUBKEYS.strip()
+        if "process_rewards_and_penalties" in functions:
+            # `get_flag_index_deltas` and `get_inactivity_penalty_deltas` stay available, e.g. for the rewards tests
+            functions["get_participation_deltas"] = OPTIMIZED_GET_PARTICIPATION_DELTAS.strip()
+            functions["process_rewards_and_penalties"] = OPTIMIZED_PROCESS_REWARDS_AND_PENALTIES.strip()
+        if "process_sync_aggregate" in functions:
+            functions["process_sync_aggregate"] = replace_source(
+                functions["process_sync_aggregate"],
+                "    committee_pubkeys = state.current_sync_committee.pubkeys\n"
+                "    participant_pubkeys = [pubkey for pubkey, bit in zip(committee_pubkeys, "
+                "sync_aggregate.sync_committee_bits) if bit]\n",
+                "",
+            )
+            functions["process_sync_aggregate"] = replace_source(
+                functions["process_sync_aggregate"],
+                "    assert eth_fast_aggregate_verify(participant_pubkeys, signing_root, "
+                "sync_aggregate.sync_committee_signature)",
+                "    assert is_valid_sync_committee_signature(\n"
+                "        state.current_sync_committee,\n"
+                "        sync_aggregate.sync_committee_bits,\n"
+                "        signing_root,\n"
+                "        sync_aggregate.sync_committee_signature,\n"
+                "    )",
+            )
+            functions["process_sync_aggregate"] = replace_source(
+                functions["process_sync_aggregate"],
+                "    all_pubkeys = [v.pubkey for v in state.validators]\n"
+                "    committee_indices = [ValidatorIndex(all_pubkeys.index(pubkey)) "
+                "for pubkey in state.current_sync_committee.pubkeys]",
+                "    committee_indices = [\n"
+                "        get_registered_validator_index(state, pubkey) for pubkey in state.current_sync_committee.pubkeys\n"
+                "    ]",
+            )
         return functions
@@ -2,6 +2,15 @@ from abc import ABC, abstractmethod
 from typing import Sequence, Dict
 from pathlib import Path
 
+
+def replace_source(source: str, old: str, new: str) -> str:
+    """
+    Replace ``old`` with ``new`` in the source of a spec function, failing if the spec no longer has ``old``.
+    """
+    assert old in source, f"missing from the spec source: {old}"
+    return source.replace(old, new)
+
+
 class BaseSpecBuilder(ABC):
     @property
     @abstractmethod
@@ -1,4 +1,6 @@
-from .base import BaseSpecBuilder
+from typing import Dict
+
+from .base import BaseSpecBuilder, replace_source
 from ..constants import BELLATRIX
 
 class BellatrixSpecBuilder(BaseSpecBuilder):
@@ -69,3 +71,12 @@ EXECUTION_ENGINE = NoopExecutionEngine()"""
         return {
             'MAX_BYTES_PER_TRANSACTION': spec_object.preset_vars['MAX_BYTES_PER_TRANSACTION'].value,
         }
+
+    @classmethod
+    def implement_optimizations(cls, functions: Dict[str, str]) -> Dict[str, str]:
+        if "get_participation_deltas" in functions:
+            # As `get_inactivity_penalty_deltas`, modified to use `INACTIVITY_PENALTY_QUOTIENT_BELLATRIX`
+            functions["get_participation_deltas"] = replace_source(
+                functions["get_participation_deltas"],
+                "INACTIVITY_PENALTY_QUOTIENT_ALTAIR", "INACTIVITY_PENALTY_QUOTIENT_BELLATRIX")
+        return functions
@@ -1,6 +1,6 @@
 from typing import Dict
 
-from .base import BaseSpecBuilder
+from .base import BaseSpecBuilder, replace_source
 from ..constants import CAPELLA
 
 
@@ -11,6 +11,48 @@ class CapellaSpecBuilder(BaseSpecBuilder):
     def imports(cls, preset_name: str):
         return f'''
 from eth2spec.bellatrix import {preset_name} as bellatrix
+from typing import Iterator
+from eth2spec.utils.withdrawal_sweep import WithdrawalCandidateIndex, iter_sweep_candidates
+'''
+
+    @classmethod
+    def sundry_functions(cls) -> str:
+        return '''
+withdrawal_candidate_index = WithdrawalCandidateIndex(
+    FAR_FUTURE_EPOCH, MAX_EFFECTIVE_BALANCE, bytes(ETH1_ADDRESS_WITHDRAWAL_PREFIX))
+
+
+def get_withdrawal_sweep(state: BeaconState,
+                         validator_index: ValidatorIndex,
+                         bound: uint64) -> Iterator[ValidatorIndex]:
+    """
+    Iterate over the validators of the sweep of ``bound`` validators from ``validator_index``
+    that may be withdrawable, in sweep order.
+    """
+    candidates = withdrawal_candidate_index.get_candidates(state.validators, state.balances)
+    for index in iter_sweep_candidates(candidates, validator_index, bound, len(state.validators)):
+        yield ValidatorIndex(index)
+
+
+_get_expected_withdrawals = get_expected_withdrawals
+expected_withdrawals_cache: LRU = LRU(size=16)
+
+
+def get_expected_withdrawals_with_cache(state: BeaconState) -> Sequence[Withdrawal]:
+    # Computed once for the payload and for `process_withdrawals`
+    key = (
+        state.validators.get_backing(),
+        state.balances.get_backing(),
+        state.next_withdrawal_index,
+        state.next_withdrawal_validator_index,
+        get_current_epoch(state),
+    )
+    if key not in expected_withdrawals_cache:
+        expected_withdrawals_cache[key] = _get_expected_withdrawals(state)
+    return [withdrawal.copy() for withdrawal in expected_withdrawals_cache[key]]
+
+
+get_expected_withdrawals = get_expected_withdrawals_with_cache
 '''
 
     @classmethod
@@ -18,3 +60,22 @@ from eth2spec.bellatrix import {preset_name} as bellatrix
         return {
             'EXECUTION_PAYLOAD_GINDEX': 'GeneralizedIndex(25)',
         }
+
+    @classmethod
+    def implement_optimizations(cls, functions: Dict[str, str]) -> Dict[str, str]:
+        if "get_expected_withdrawals" in functions:
+            functions["get_expected_withdrawals"] = replace_source(
+                functions["get_expected_withdrawals"],
+                "    for _ in range(bound):\n"
+                "        validator = state.validators[validator_index]",
+                "    # Only the validators of the sweep that may be withdrawable are checked\n"
+                "    for validator_index in get_withdrawal_sweep(state, validator_index, bound):\n"
+                "        validator = state.validators[validator_index]",
+            )
+            functions["get_expected_withdrawals"] = replace_source(
+                functions["get_expected_withdrawals"],
+                "            break\n"
+                "        validator_index = ValidatorIndex((validator_index + 1) % len(state.validators))\n",
+                "            break\n",
+            )
+        return functions
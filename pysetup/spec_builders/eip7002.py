@@ -1,4 +1,6 @@
-from .base import BaseSpecBuilder
+from typing import Dict
+
+from .base import BaseSpecBuilder, replace_source
 from ..constants import EIP7002
 
 
@@ -10,3 +12,14 @@ class EIP7002SpecBuilder(BaseSpecBuilder):
         return super().imports(preset_name) + f'''
 from eth2spec.capella import {preset_name} as capella
 '''
+
+    @classmethod
+    def implement_optimizations(cls, functions: Dict[str, str]) -> Dict[str, str]:
+        if "process_execution_layer_exit" in functions:
+            functions["process_execution_layer_exit"] = replace_source(
+                functions["process_execution_layer_exit"],
+                "    validator_pubkeys = [v.pubkey for v in state.validators]\n"
+                "    validator_index = ValidatorIndex(validator_pubkeys.index(execution_layer_exit.validator_pubkey))",
+                "    validator_index = get_registered_validator_index(state, execution_layer_exit.validator_pubkey)",
+            )
+        return functions
@@ -1,5 +1,7 @@
-from .base import BaseSpecBuilder
-from ..constants import PHASE0
+from typing import Dict
+
+from .base import BaseSpecBuilder, replace_source
+from ..constants import PHASE0, OPTIMIZED_APPLY_DEPOSIT
 
 
 class Phase0SpecBuilder(BaseSpecBuilder):
@@ -15,6 +17,7 @@ from dataclasses import (
 from typing import (
     Any, Callable, Dict, Set, Sequence, Tuple, Optional, TypeVar, NamedTuple, Final
 )
+from typing import List as PyList
 
 from eth2spec.utils.ssz.ssz_impl import hash_tree_root, copy, uint_to_bytes
 from eth2spec.utils.ssz.ssz_typing import (
@@ -23,6 +26,10 @@ from eth2spec.utils.ssz.ssz_typing import (
 from eth2spec.utils.ssz.ssz_typing import Bitvector  # noqa: F401
 from eth2spec.utils import bls
 from eth2spec.utils.hash_function import hash
+from eth2spec.utils.proto_array import ProtoArrayForkChoice
+from eth2spec.utils.active_balance import ActiveBalanceTotals
+from eth2spec.utils.pubkey_index import PubkeyIndexMap
+from eth2spec.utils.registry_queues import RegistryQueueIndex, RegistryQueues
 '''
 
     @classmethod
@@ -61,30 +68,184 @@ compute_shuffled_index = cache_this(
     lambda index, index_count, seed: (index, index_count, seed),
     _compute_shuffled_index, lru_size=SLOTS_PER_EPOCH * 3)
 
+
+def compute_shuffled_indices(index_count: uint64, seed: Bytes32) -> PyList[int]:
+    """
+    Return ``compute_shuffled_index(index, index_count, seed)`` for every ``index`` below ``index_count``.
+    Each swap-or-not round is applied to the whole list at once, with one hash per 256 positions.
+    """
+    count = int(index_count)
+    shuffled = list(range(count))
+    if count == 0:
+        return shuffled
+    for current_round in range(SHUFFLE_ROUND_COUNT):
+        round_bytes = uint_to_bytes(uint8(current_round))
+        pivot = int(bytes_to_uint64(hash(seed + round_bytes)[0:8])) % count
+        source = b''.join(
+            hash(seed + round_bytes + uint_to_bytes(uint32(position_chunk)))
+            for position_chunk in range((count + 255) // 256)
+        )
+        for i, index in enumerate(shuffled):
+            flip = (pivot + count - index) % count
+            position = max(index, flip)
+            if (source[position // 8] >> (position % 8)) % 2:
+                shuffled[i] = flip
+    return shuffled
+
+
+# Whole-list shufflings, by (index_count, seed)
+shuffling_cache = LRU(size=SLOTS_PER_EPOCH)
+
+
+def get_shuffling(index_count: uint64, seed: Bytes32) -> PyList[int]:
+    key = (index_count, seed)
+    if key not in shuffling_cache:
+        shuffling_cache[key] = compute_shuffled_indices(index_count, seed)
+    return shuffling_cache[key]
+
+
+_compute_committee = compute_committee
+
+
+def compute_committee_with_shuffling(indices: Sequence[ValidatorIndex],
+                                     seed: Bytes32,
+                                     index: uint64,
+                                     count: uint64) -> Sequence[ValidatorIndex]:
+    shuffling = get_shuffling(uint64(len(indices)), seed)
+    start = (len(indices) * index) // count
+    end = (len(indices) * uint64(index + 1)) // count
+    # As in `compute_shuffled_index`, positions past the end of the list are invalid
+    assert start == end or end <= len(indices)
+    return [indices[shuffling[i]] for i in range(start, end)]
+
+
+compute_committee = compute_committee_with_shuffling
+
+_compute_shuffled_index_with_cache = compute_shuffled_index
+
+
+def compute_shuffled_index_with_shuffling(index: uint64, index_count: uint64, seed: Bytes32) -> uint64:
+    """
+    Look ``index`` up in the whole-list shuffling if there is one for ``index_count`` and ``seed``.
+    Proposer and sync committee sampling only visit a few positions, these shuffle them one by one otherwise.
+    """
+    assert index < index_count
+    key = (index_count, seed)
+    if key in shuffling_cache:
+        return uint64(shuffling_cache[key][index])
+    return _compute_shuffled_index_with_cache(index, index_count, seed)
+
+
+compute_shuffled_index = compute_shuffled_index_with_shuffling
+
+active_balance_totals = ActiveBalanceTotals()
+
+
+def get_active_balance_totals(state: BeaconState) -> Tuple[uint64, Gwei]:
+    """
+    Return the number of active validators of the current epoch and their combined effective balance.
+    """
+    count, total = active_balance_totals.get_totals(state.validators, get_current_epoch(state))
+    return uint64(count), Gwei(total)
+
+
 _get_total_active_balance = get_total_active_balance
-get_total_active_balance = cache_this(
-    lambda state: (state.validators.hash_tree_root(), compute_epoch_at_slot(state.slot)),
-    _get_total_active_balance, lru_size=10)
+
+
+def get_total_active_balance_with_totals(state: BeaconState) -> Gwei:
+    _, total = get_active_balance_totals(state)
+    # As in `get_total_balance`
+    return Gwei(max(EFFECTIVE_BALANCE_INCREMENT, total))
+
+
+get_total_active_balance = get_total_active_balance_with_totals
+
+registry_queue_index = RegistryQueueIndex(FAR_FUTURE_EPOCH, MAX_EFFECTIVE_BALANCE)
+
+
+def get_registry_queues(state: BeaconState) -> RegistryQueues:
+    """
+    Return the exit churn by epoch, the activation queue and the candidates for registry updates of ``state``.
+    """
+    return registry_queue_index.get_queues(state.validators, config.EJECTION_BALANCE)
 
 _get_base_reward = get_base_reward
 get_base_reward = cache_this(
     lambda state, index: (state.validators.hash_tree_root(), state.slot, index),
     _get_base_reward, lru_size=2048)
 
+# The registry lookups below are keyed by the backing node of `state.validators`, not by its root:
+# tree nodes are immutable, and an unchanged registry keeps its backing across states and copies.
 _get_committee_count_per_slot = get_committee_count_per_slot
 get_committee_count_per_slot = cache_this(
-    lambda state, epoch: (state.validators.hash_tree_root(), epoch),
+    lambda state, epoch: (state.validators.get_backing(), epoch),
     _get_committee_count_per_slot, lru_size=SLOTS_PER_EPOCH * 3)
 
 _get_active_validator_indices = get_active_validator_indices
 get_active_validator_indices = cache_this(
-    lambda state, epoch: (state.validators.hash_tree_root(), epoch),
+    lambda state, epoch: (state.validators.get_backing(), epoch),
     _get_active_validator_indices, lru_size=3)
 
+
+@dataclass
+class EpochShuffling(object):
+    seed: Bytes32
+    active_validator_indices: Sequence[ValidatorIndex]
+    # The active validator indices in committee order
+    shuffled_indices: Sequence[ValidatorIndex]
+    committees_per_slot: uint64
+
+
+# Committee shufflings by (seed, digest of the active validator indices), shared by all states of an epoch
+epoch_shuffling_cache = LRU(size=SLOTS_PER_EPOCH)
+# Shuffling keys by (registry backing, epoch, seed), so the active validator indices are digested once per registry
+epoch_shuffling_keys = LRU(size=SLOTS_PER_EPOCH * 3)
+
+
+def set_epoch_shuffling_cache_size(size: int) -> None:
+    """
+    Set the number of epoch shufflings to keep, each one holds two lists of the active validator indices.
+    """
+    epoch_shuffling_cache.set_size(size)
+
+
+def get_epoch_shuffling(state: BeaconState, epoch: Epoch) -> EpochShuffling:
+    seed = get_seed(state, epoch, DOMAIN_BEACON_ATTESTER)
+    registry_key = (state.validators.get_backing(), epoch, seed)
+    if registry_key not in epoch_shuffling_keys:
+        indices = get_active_validator_indices(state, epoch)
+        epoch_shuffling_keys[registry_key] = (seed, hash(b''.join(uint_to_bytes(index) for index in indices)))
+    key = epoch_shuffling_keys[registry_key]
+    if key not in epoch_shuffling_cache:
+        indices = get_active_validator_indices(state, epoch)
+        shuffling = get_shuffling(uint64(len(indices)), seed)
+        epoch_shuffling_cache[key] = EpochShuffling(
+            seed=seed,
+            active_validator_indices=indices,
+            shuffled_indices=[indices[position] for position in shuffling],
+            committees_per_slot=get_committee_count_per_slot(state, epoch),
+        )
+    return epoch_shuffling_cache[key]
+
+
 _get_beacon_committee = get_beacon_committee
-get_beacon_committee = cache_this(
-    lambda state, slot, index: (state.validators.hash_tree_root(), state.randao_mixes.hash_tree_root(), slot, index),
-    _get_beacon_committee, lru_size=SLOTS_PER_EPOCH * MAX_COMMITTEES_PER_SLOT * 3)
+
+
+def get_beacon_committee_with_epoch_shuffling(state: BeaconState,
+                                              slot: Slot,
+                                              index: CommitteeIndex) -> Sequence[ValidatorIndex]:
+    epoch_shuffling = get_epoch_shuffling(state, compute_epoch_at_slot(slot))
+    indices = epoch_shuffling.shuffled_indices
+    committee_index = (slot % SLOTS_PER_EPOCH) * epoch_shuffling.committees_per_slot + index
+    count = epoch_shuffling.committees_per_slot * SLOTS_PER_EPOCH
+    start = (len(indices) * committee_index) // count
+    end = (len(indices) * uint64(committee_index + 1)) // count
+    # As in `compute_shuffled_index`, positions past the end of the list are invalid
+    assert start == end or end <= len(indices)
+    return indices[start:end]
+
+
+get_beacon_committee = get_beacon_committee_with_epoch_shuffling
 
 _get_matching_target_attestations = get_matching_target_attestations
 get_matching_target_attestations = cache_this(
@@ -102,4 +263,587 @@ get_attesting_indices = cache_this(
         state.randao_mixes.hash_tree_root(),
         state.validators.hash_tree_root(), data.hash_tree_root(), bits.hash_tree_root()
     ),
-    _get_attesting_indices, lru_size=SLOTS_PER_EPOCH * MAX_COMMITTEES_PER_SLOT * 3)'''
+    _get_attesting_indices, lru_size=SLOTS_PER_EPOCH * MAX_COMMITTEES_PER_SLOT * 3)
+
+pubkey_index_map = PubkeyIndexMap()
+
+
+def get_validator_index_by_pubkey(state: BeaconState, pubkey: BLSPubkey) -> Optional[ValidatorIndex]:
+    """
+    Return the index of the validator with ``pubkey``, or ``None`` if there is none.
+    """
+    index = pubkey_index_map.get_index(state.validators, pubkey)
+    return None if index is None else ValidatorIndex(index)
+
+
+def get_registered_validator_index(state: BeaconState, pubkey: BLSPubkey) -> ValidatorIndex:
+    """
+    Return the index of the validator with ``pubkey``, as ``[v.pubkey for v in state.validators].index(pubkey)``.
+    """
+    index = get_validator_index_by_pubkey(state, pubkey)
+    if index is None:
+        raise ValueError(f"no validator with pubkey {pubkey.hex()}")
+    return index
+
+
+_add_validator_to_registry = add_validator_to_registry
+
+
+def add_validator_to_registry_with_pubkey_index(state: BeaconState,
+                                                pubkey: BLSPubkey,
+                                                withdrawal_credentials: Bytes32,
+                                                amount: uint64) -> None:
+    registry = state.validators.get_backing()
+    validator_count = len(state.validators)
+    _add_validator_to_registry(state, pubkey, withdrawal_credentials, amount)
+    if len(state.validators) == validator_count + 1:
+        pubkey_index_map.on_append(registry, state.validators)
+        bls.cache_validator_pubkey(validator_count, pubkey)
+
+
+add_validator_to_registry = add_validator_to_registry_with_pubkey_index
+
+
+def enable_proto_array(store: Store) -> None:
+    """
+    Attach a proto-array fork choice engine to ``store``.
+    ``get_head`` and ``get_weight`` on this store are then served from per-block weights,
+    which ``on_block``, ``on_attestation`` and ``on_attester_slashing`` keep up to date.
+    ``get_ancestor`` follows the skip pointers of the proto-array nodes.
+    """
+    proto_array = ProtoArrayForkChoice()
+    for root, block in sorted(store.blocks.items(), key=lambda item: item[1].slot):
+        proto_array.on_block(root, block.parent_root, block.slot)
+    for validator_index in store.equivocating_indices:
+        proto_array.process_equivocation(validator_index)
+    for validator_index, message in store.latest_messages.items():
+        proto_array.process_vote(validator_index, message.root)
+    setattr(store, 'proto_array', proto_array)
+
+
+def disable_proto_array(store: Store) -> None:
+    setattr(store, 'proto_array', None)
+
+
+def get_proto_array(store: Store) -> Optional[ProtoArrayForkChoice]:
+    return getattr(store, 'proto_array', None)
+
+
+def get_justified_balances(store: Store) -> Sequence[Gwei]:
+    """
+    The vote weight of every validator, as counted by ``get_weight``.
+    """
+    state = store.checkpoint_states[store.justified_checkpoint]
+    current_epoch = get_current_epoch(state)
+    return [
+        v.effective_balance if is_active_validator(v, current_epoch) and not v.slashed else Gwei(0)
+        for v in state.validators
+    ]
+
+
+def is_viable_for_head(store: Store, block_root: Root) -> bool:
+    """
+    The leaf condition of ``filter_block_tree``.
+    """
+    current_epoch = get_current_store_epoch(store)
+    voting_source = get_voting_source(store, block_root)
+    correct_justified = (
+        store.justified_checkpoint.epoch == GENESIS_EPOCH
+        or voting_source.epoch == store.justified_checkpoint.epoch
+        or voting_source.epoch + 2 >= current_epoch
+    )
+    finalized_checkpoint_block = get_checkpoint_block(store, block_root, store.finalized_checkpoint.epoch)
+    correct_finalized = (
+        store.finalized_checkpoint.epoch == GENESIS_EPOCH
+        or store.finalized_checkpoint.root == finalized_checkpoint_block
+    )
+    return correct_justified and correct_finalized
+
+
+def update_proto_array(store: Store, proto_array: ProtoArrayForkChoice) -> None:
+    # The viability of a leaf only changes with the checkpoints and the current epoch
+    proto_array.update_viability_context(
+        (store.justified_checkpoint, store.finalized_checkpoint, get_current_store_epoch(store)))
+    # The balances only change with the justified checkpoint
+    if proto_array.justified_checkpoint != store.justified_checkpoint:
+        proto_array.update_balances(store.justified_checkpoint, get_justified_balances(store))
+    if store.proposer_boost_root == Root():
+        proto_array.apply_score_changes(None, 0)
+    else:
+        proto_array.apply_score_changes(store.proposer_boost_root, get_proposer_score(store))
+
+
+_get_ancestor = get_ancestor
+
+
+def get_ancestor_with_proto_array(store: Store, root: Root, slot: Slot) -> Root:
+    proto_array = get_proto_array(store)
+    if proto_array is not None and root in proto_array.proto_array:
+        ancestor = proto_array.get_ancestor(root, slot)
+        if ancestor is not None:
+            return Root(ancestor)
+    return _get_ancestor(store, root, slot)
+
+
+get_ancestor = get_ancestor_with_proto_array
+
+
+_get_head = get_head
+
+
+def get_head_with_proto_array(store: Store) -> Root:
+    proto_array = get_proto_array(store)
+    if proto_array is None:
+        return _get_head(store)
+    update_proto_array(store, proto_array)
+    head = proto_array.find_head(store.justified_checkpoint.root, lambda root: is_viable_for_head(store, Root(root)))
+    return Root(head)
+
+
+get_head = get_head_with_proto_array
+
+
+_get_filtered_block_tree = get_filtered_block_tree
+
+
+def get_filtered_block_tree_with_cache(store: Store) -> Dict[Root, BeaconBlock]:
+    """
+    The filtered block tree of a store without a proto-array engine, kept on ``store`` until
+    the blocks, the checkpoints or the current epoch change.
+    """
+    # Checkpoints are copied, as they may be changed in place
+    key = (store.justified_checkpoint.copy(), store.finalized_checkpoint.copy(),
+           get_current_store_epoch(store), len(store.blocks))
+    filtered_block_tree = getattr(store, 'filtered_block_tree', None)
+    if filtered_block_tree is None or filtered_block_tree[0] != key:
+        filtered_block_tree = (key, _get_filtered_block_tree(store))
+        setattr(store, 'filtered_block_tree', filtered_block_tree)
+    return dict(filtered_block_tree[1])
+
+
+def get_filtered_block_tree_with_proto_array(store: Store) -> Dict[Root, BeaconBlock]:
+    proto_array = get_proto_array(store)
+    if proto_array is None:
+        return get_filtered_block_tree_with_cache(store)
+    update_proto_array(store, proto_array)
+    roots = proto_array.get_filtered_block_tree(
+        store.justified_checkpoint.root, lambda root: is_viable_for_head(store, Root(root)))
+    return {Root(root): store.blocks[Root(root)] for root in roots}
+
+
+get_filtered_block_tree = get_filtered_block_tree_with_proto_array
+
+
+_get_weight = get_weight
+
+
+def get_weight_with_proto_array(store: Store, root: Root) -> Gwei:
+    proto_array = get_proto_array(store)
+    if proto_array is None:
+        return _get_weight(store, root)
+    update_proto_array(store, proto_array)
+    return Gwei(proto_array.get_weight(root))
+
+
+get_weight = get_weight_with_proto_array
+
+
+_on_block = on_block
+
+
+def on_block_with_proto_array(store: Store, signed_block: SignedBeaconBlock) -> None:
+    _on_block(store, signed_block)
+    proto_array = get_proto_array(store)
+    if proto_array is not None:
+        block = signed_block.message
+        proto_array.on_block(hash_tree_root(block), block.parent_root, block.slot)
+
+
+on_block = on_block_with_proto_array
+
+
+_update_latest_messages = update_latest_messages
+
+
+def update_latest_messages_with_proto_array(store: Store,
+                                            attesting_indices: Sequence[ValidatorIndex],
+                                            attestation: Attestation) -> None:
+    proto_array = get_proto_array(store)
+    if proto_array is None:
+        _update_latest_messages(store, attesting_indices, attestation)
+        return
+    previous_messages = {i: store.latest_messages.get(i) for i in attesting_indices}
+    _update_latest_messages(store, attesting_indices, attestation)
+    # Only the validators whose latest message changed move their weight
+    for i in attesting_indices:
+        if i in store.latest_messages and store.latest_messages[i] != previous_messages[i]:
+            proto_array.process_vote(i, store.latest_messages[i].root)
+
+
+update_latest_messages = update_latest_messages_with_proto_array
+
+
+_on_attester_slashing = on_attester_slashing
+
+
+def on_attester_slashing_with_proto_array(store: Store, attester_slashing: AttesterSlashing) -> None:
+    _on_attester_slashing(store, attester_slashing)
+    proto_array = get_proto_array(store)
+    if proto_array is not None:
+        attestation_1 = attester_slashing.attestation_1
+        attestation_2 = attester_slashing.attestation_2
+        for index in set(attestation_1.attesting_indices).intersection(attestation_2.attesting_indices):
+            proto_array.process_equivocation(index)
+
+
+on_attester_slashing = on_attester_slashing_with_proto_array
+
+
+def enable_store_pruning(store: Store) -> None:
+    """
+    Prune ``store`` with ``prune_store`` every time its finalized checkpoint advances.
+    """
+    setattr(store, 'pruning', True)
+
+
+def is_store_pruning_enabled(store: Store) -> bool:
+    return getattr(store, 'pruning', False)
+
+
+def prune_store(store: Store) -> None:
+    """
+    Drop the blocks that are not descendants of the finalized checkpoint block, along with their states.
+    Latest messages for dropped blocks are kept, they do not count towards the weight of any remaining block.
+    """
+    finalized_root = store.finalized_checkpoint.root
+    finalized_slot = store.blocks[finalized_root].slot
+    descendants = {finalized_root}
+    for root, block in sorted(store.blocks.items(), key=lambda item: item[1].slot):
+        if block.slot > finalized_slot and block.parent_root in descendants:
+            descendants.add(root)
+
+    for root in [root for root in store.blocks.keys() if root not in descendants]:
+        del store.blocks[root]
+        store.block_states.pop(root, None)
+        store.block_timeliness.pop(root, None)
+        store.unrealized_justifications.pop(root, None)
+    for checkpoint in list(store.checkpoint_states.keys()):
+        if checkpoint.epoch < store.finalized_checkpoint.epoch or checkpoint.root not in descendants:
+            del store.checkpoint_states[checkpoint]
+
+    children_index = getattr(store, 'children_index', None)
+    if children_index is not None:
+        setattr(store, 'children_index', {
+            root: [child for child in children if child in descendants]
+            for root, children in children_index.items() if root in descendants
+        })
+    proto_array = get_proto_array(store)
+    if proto_array is not None:
+        proto_array.prune(finalized_root)
+
+
+_update_checkpoints = update_checkpoints
+
+
+def update_checkpoints_with_pruning(store: Store,
+                                    justified_checkpoint: Checkpoint,
+                                    finalized_checkpoint: Checkpoint) -> None:
+    finalized_epoch = store.finalized_checkpoint.epoch
+    _update_checkpoints(store, justified_checkpoint, finalized_checkpoint)
+    if is_store_pruning_enabled(store) and store.finalized_checkpoint.epoch > finalized_epoch:
+        prune_store(store)
+
+
+update_checkpoints = update_checkpoints_with_pruning
+
+
+_get_ancestor_with_proto_array = get_ancestor
+
+
+def get_ancestor_with_pruning(store: Store, root: Root, slot: Slot) -> Root:
+    # A pruned block is not a descendant of the finalized checkpoint block, and neither is any of its ancestors
+    # from the finalized slot on: the pruned root itself does not match any block left in ``store``
+    if root not in store.blocks and is_store_pruning_enabled(store):
+        return root
+    return _get_ancestor_with_proto_array(store, root, slot)
+
+
+get_ancestor = get_ancestor_with_pruning
+
+
+def get_children_index(store: Store) -> Dict[Root, PyList[Root]]:
+    """
+    Return the index from every block root in ``store`` to the roots of its children, in ``store.blocks`` order.
+    ``on_block`` and ``prune_store`` keep it up to date, it is rebuilt if ``store.blocks`` was modified otherwise.
+    """
+    children_index = getattr(store, 'children_index', None)
+    if children_index is None or len(children_index) != len(store.blocks):
+        children_index = {root: [] for root in store.blocks.keys()}
+        for root, block in store.blocks.items():
+            if block.parent_root in children_index:
+                children_index[block.parent_root].append(root)
+        setattr(store, 'children_index', children_index)
+    return children_index
+
+
+def get_children(store: Store, block_root: Root) -> Sequence[Root]:
+    return get_children_index(store)[block_root]
+
+
+_on_block_with_proto_array = on_block
+
+
+def on_block_with_children_index(store: Store, signed_block: SignedBeaconBlock) -> None:
+    get_children_index(store)
+    _on_block_with_proto_array(store, signed_block)
+    # The index may have been replaced by ``prune_store`` meanwhile
+    children_index = getattr(store, 'children_index')
+    block_root = hash_tree_root(signed_block.message)
+    if block_root not in children_index and len(children_index) + 1 == len(store.blocks):
+        children_index[block_root] = []
+        children_index[signed_block.message.parent_root].append(block_root)
+
+
+on_block = on_block_with_children_index
+
+
+# Checkpoint states by ``(root, epoch)``, shared by all stores
+checkpoint_state_cache = LRU(size=64)
+checkpoint_state_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def get_checkpoint_state_cache_stats() -> Dict[str, int]:
+    return dict(checkpoint_state_cache_stats)
+
+
+_store_target_checkpoint_state = store_target_checkpoint_state
+
+
+def store_target_checkpoint_state_with_cache(store: Store, target: Checkpoint) -> None:
+    if target in store.checkpoint_states:
+        return
+    key = (target.root, target.epoch)
+    if key in checkpoint_state_cache:
+        checkpoint_state_cache_stats['hits'] += 1
+    else:
+        checkpoint_state_cache_stats['misses'] += 1
+        # Resume from the latest cached checkpoint state of the same block, instead of the block state
+        base_epochs = [
+            epoch for root, epoch in checkpoint_state_cache.keys()
+            if root == target.root and epoch < target.epoch
+        ]
+        if len(base_epochs) > 0:
+            base_state = copy(checkpoint_state_cache[(target.root, max(base_epochs))])
+        else:
+            base_state = copy(store.block_states[target.root])
+        if base_state.slot < compute_start_slot_at_epoch(target.epoch):
+            process_slots(base_state, compute_start_slot_at_epoch(target.epoch))
+        checkpoint_state_cache[key] = base_state
+    # Copies share their backing with the cached state
+    store.checkpoint_states[target] = copy(checkpoint_state_cache[key])
+
+
+store_target_checkpoint_state = store_target_checkpoint_state_with_cache
+
+
+def get_indexed_attestation_signature_set(
+        state: BeaconState,
+        indexed_attestation: IndexedAttestation) -> Optional[Tuple[Sequence[BLSPubkey], Root, BLSSignature]]:
+    """
+    Return the signature set checked by ``is_valid_indexed_attestation``,
+    or ``None`` if ``indexed_attestation`` is invalid regardless of its signature.
+    """
+    indices = indexed_attestation.attesting_indices
+    if len(indices) == 0 or not indices == sorted(set(indices)):
+        return None
+    pubkeys = [state.validators[i].pubkey for i in indices]
+    domain = get_domain(state, DOMAIN_BEACON_ATTESTER, indexed_attestation.data.target.epoch)
+    signing_root = compute_signing_root(indexed_attestation.data, domain)
+    return pubkeys, signing_root, indexed_attestation.signature
+
+
+def on_attestations(store: Store, attestations: Sequence[Attestation], is_from_block: bool=False) -> Sequence[bool]:
+    """
+    Run ``on_attestation`` on every attestation of ``attestations``, in order, verifying their signatures at once.
+    Return whether each attestation was accepted. An attestation is rejected, and has no effect,
+    exactly where ``on_attestation`` would fail an assertion.
+    """
+    indexed_attestations: Dict[int, IndexedAttestation] = {}
+    signature_sets = {}
+    for i, attestation in enumerate(attestations):
+        try:
+            validate_on_attestation(store, attestation, is_from_block)
+        except AssertionError:
+            continue
+        store_target_checkpoint_state(store, attestation.data.target)
+        target_state = store.checkpoint_states[attestation.data.target]
+        indexed_attestation = get_indexed_attestation(target_state, attestation)
+        signature_set = get_indexed_attestation_signature_set(target_state, indexed_attestation)
+        if signature_set is not None:
+            indexed_attestations[i] = indexed_attestation
+            signature_sets[i] = signature_set
+
+    # Only look for the invalid signatures if the batch fails
+    if not bls.FastAggregateVerifyMultiple(list(signature_sets.values())):
+        for i, signature_set in signature_sets.items():
+            if not bls.FastAggregateVerify(*signature_set):
+                del indexed_attestations[i]
+
+    # The latest messages depend on the order of the updates
+    for i, indexed_attestation in sorted(indexed_attestations.items()):
+        update_latest_messages(store, indexed_attestation.attesting_indices, attestations[i])
+    return [i in indexed_attestations for i in range(len(attestations))]
+
+
+_apply_deposit = apply_deposit
+
+
+def apply_deposit_with_immediate_signature_check(state: BeaconState,
+                                                 pubkey: BLSPubkey,
+                                                 withdrawal_credentials: Bytes32,
+                                                 amount: uint64,
+                                                 signature: BLSSignature) -> None:
+    # An invalid deposit signature skips the deposit instead of failing the block, it cannot be deferred
+    with bls.immediate_signature_checks():
+        _apply_deposit(state, pubkey, withdrawal_credentials, amount, signature)
+
+
+apply_deposit = apply_deposit_with_immediate_signature_check
+
+
+def state_transition_with_deferred_signatures(state: BeaconState,
+                                              signed_block: SignedBeaconBlock,
+                                              validate_result: bool=True) -> None:
+    """
+    Run ``state_transition``, checking all the signatures of the block at once after processing it.
+    If that check fails, or the block fails otherwise, ``state_transition`` is run again on the pre-state
+    with signatures checked one by one, so that ``state`` ends as with ``state_transition``.
+    """
+    pre_state = copy(state)
+    try:
+        with bls.deferred_signature_checks() as signature_sets:
+            state_transition(state, signed_block, validate_result)
+        if bls.FastAggregateVerifyMultiple(signature_sets):
+            return
+    except Exception:
+        pass
+    state.set_backing(pre_state.get_backing())
+    state_transition(state, signed_block, validate_result)
+
+
+def fast_forward_slots(state: BeaconState, slot: Slot) -> None:
+    """
+    Run ``process_slot`` and advance ``state.slot`` up to ``slot``, none of the slots in between ending an epoch.
+    After the first slot only ``slot`` and the root caches change, and the block root stays the same,
+    so the following slots set their chunks straight on the state backing.
+    """
+    if state.slot >= slot:
+        return
+    process_slot(state)
+    state.slot = Slot(state.slot + 1)
+
+    block_root_node = hash_tree_root(state.latest_block_header).get_backing()
+    field_names = list(BeaconState.fields().keys())
+    state_roots_gindex = (
+        (2**BeaconState.tree_depth() + field_names.index('state_roots')) << state.state_roots.tree_depth())
+    block_roots_gindex = (
+        (2**BeaconState.tree_depth() + field_names.index('block_roots')) << state.block_roots.tree_depth())
+    slot_gindex = 2**BeaconState.tree_depth() + field_names.index('slot')
+    backing = state.get_backing()
+    # Plain ints, gindex arithmetic on uint64 views is slow
+    for current_slot in range(int(state.slot), int(slot)):
+        index = current_slot % int(SLOTS_PER_HISTORICAL_ROOT)
+        backing = backing.setter(state_roots_gindex + index)(Root(backing.merkle_root()).get_backing())
+        backing = backing.setter(block_roots_gindex + index)(block_root_node)
+        backing = backing.setter(slot_gindex)(Slot(current_slot + 1).get_backing())
+    state.set_backing(backing)
+
+
+def process_slots_with_fast_forward(state: BeaconState, slot: Slot) -> None:
+    assert state.slot < slot
+    while state.slot < slot:
+        # Process epoch on the start slot of the next epoch
+        last_slot_of_epoch = Slot(compute_start_slot_at_epoch(Epoch(compute_epoch_at_slot(state.slot) + 1)) - 1)
+        if slot <= last_slot_of_epoch:
+            fast_forward_slots(state, slot)
+        else:
+            fast_forward_slots(state, last_slot_of_epoch)
+            process_slot(state)
+            process_epoch(state)
+            state.slot = Slot(state.slot + 1)
+
+
+process_slots = process_slots_with_fast_forward'''
+
+    @classmethod
+    def implement_optimizations(cls, functions: Dict[str, str]) -> Dict[str, str]:
+        if "filter_block_tree" in functions:
+            functions["filter_block_tree"] = replace_source(
+                functions["filter_block_tree"],
+                "    children = [\n"
+                "        root for root in store.blocks.keys()\n"
+                "        if store.blocks[root].parent_root == block_root\n"
+                "    ]",
+                "    children = get_children(store, block_root)",
+            )
+        if "get_head" in functions:
+            functions["get_head"] = replace_source(
+                functions["get_head"],
+                "        children = [\n"
+                "            root for root in blocks.keys()\n"
+                "            if blocks[root].parent_root == head\n"
+                "        ]",
+                "        children = [root for root in get_children(store, head) if root in blocks]",
+            )
+        if "apply_deposit" in functions:
+            functions["apply_deposit"] = OPTIMIZED_APPLY_DEPOSIT.strip()
+        if "get_validator_churn_limit" in functions:
+            functions["get_validator_churn_limit"] = replace_source(
+                functions["get_validator_churn_limit"],
+                "    active_validator_indices = get_active_validator_indices(state, get_current_epoch(state))\n"
+                "    return max(MIN_PER_EPOCH_CHURN_LIMIT, "
+                "uint64(len(active_validator_indices)) // CHURN_LIMIT_QUOTIENT)",
+                "    active_validator_count, _ = get_active_balance_totals(state)\n"
+                "    return max(MIN_PER_EPOCH_CHURN_LIMIT, active_validator_count // CHURN_LIMIT_QUOTIENT)",
+            )
+        if "initiate_validator_exit" in functions:
+            functions["initiate_validator_exit"] = replace_source(
+                functions["initiate_validator_exit"],
+                "    exit_epochs = [v.exit_epoch for v in state.validators if v.exit_epoch != FAR_FUTURE_EPOCH]\n"
+                "    exit_queue_epoch = max(exit_epochs + [compute_activation_exit_epoch(get_current_epoch(state))])\n"
+                "    exit_queue_churn = len([v for v in state.validators if v.exit_epoch == exit_queue_epoch])",
+                "    registry_queues = get_registry_queues(state)\n"
+                "    exit_queue_epoch = max(Epoch(registry_queues.get_latest_exit_epoch()),\n"
+                "                           compute_activation_exit_epoch(get_current_epoch(state)))\n"
+                "    exit_queue_churn = uint64(registry_queues.exit_churn.get(exit_queue_epoch, 0))",
+            )
+        if "process_registry_updates" in functions:
+            functions["process_registry_updates"] = replace_source(
+                functions["process_registry_updates"],
+                "    # Process activation eligibility and ejections\n"
+                "    for index, validator in enumerate(state.validators):\n"
+                "        if is_eligible_for_activation_queue(validator):",
+                "    # Process activation eligibility and ejections, of the validators they may apply to only\n"
+                "    for index in get_registry_queues(state).get_registry_update_candidates():\n"
+                "        validator = state.validators[index]\n"
+                "        if is_eligible_for_activation_queue(validator):",
+            )
+            functions["process_registry_updates"] = replace_source(
+                functions["process_registry_updates"],
+                "    activation_queue = sorted([\n"
+                "        index for index, validator in enumerate(state.validators)\n"
+                "        if is_eligible_for_activation(state, validator)\n"
+                "        # Order by the sequence of activation_eligibility_epoch setting and then index\n"
+                "    ], key=lambda index: (state.validators[index].activation_eligibility_epoch, index))",
+                "    # Ordered by the sequence of activation_eligibility_epoch setting and then index\n"
+                "    registry_queues = get_registry_queues(state)\n"
+                "    activation_queue = registry_queues.get_activation_queue(state.finalized_checkpoint.epoch)",
+            )
+        if "is_valid_indexed_attestation" in functions:
+            functions["is_valid_indexed_attestation"] = replace_source(
+                functions["is_valid_indexed_attestation"],
+                "    return bls.FastAggregateVerify(pubkeys, signing_root, indexed_attestation.signature)",
+                "    return bls.FastAggregateVerifyIndexed(\n"
+                "        indices, pubkeys, signing_root, indexed_attestation.signature)",
+            )
+        return functions
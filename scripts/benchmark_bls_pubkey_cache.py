@@ -0,0 +1,64 @@
+import timeit
+
+from eth2spec.test.helpers.keys import privkeys, pubkeys
+from eth2spec.utils import bls
+
+
+BACKENDS = {
+    'fastest': bls.use_fastest,
+    'milagro': bls.use_milagro,
+    'arkworks': bls.use_arkworks,
+    'py_ecc': bls.use_py_ecc,
+}
+
+
+def benchmark_fast_aggregate_verify(backend, signers, repeat):
+    """
+    Time ``FastAggregateVerify`` over compressed pubkeys against ``FastAggregateVerifyIndexed`` over cached points.
+    """
+    BACKENDS[backend]()
+    message = b'\x56' * 32
+    signature = bls.Aggregate([bls.Sign(privkey, message) for privkey in privkeys[:signers]])
+    indices = list(range(signers))
+    signer_pubkeys = pubkeys[:signers]
+    for index, pubkey in zip(indices, signer_pubkeys):
+        bls.cache_validator_pubkey(index, pubkey)
+
+    before = timeit.timeit(lambda: bls.FastAggregateVerify(signer_pubkeys, message, signature), number=repeat)
+    after = timeit.timeit(
+        lambda: bls.FastAggregateVerifyIndexed(indices, signer_pubkeys, message, signature), number=repeat)
+    print(f"{backend:>8} {signers:>4} signers: {before / repeat * 1000:9.2f} ms -> {after / repeat * 1000:9.2f} ms")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--backends",
+        dest="backends",
+        nargs='+',
+        choices=BACKENDS.keys(),
+        default=['fastest', 'milagro'],
+        help='the BLS backends to benchmark',
+    )
+    parser.add_argument(
+        "--signers",
+        dest="signers",
+        type=int,
+        nargs='+',
+        default=[1, 16, 64, 128],
+        help='the numbers of signers of the aggregate signature',
+    )
+    parser.add_argument(
+        "--repeat",
+        dest="repeat",
+        type=int,
+        default=20,
+        help='the number of verifications timed for each case',
+    )
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        for signers in args.signers:
+            benchmark_fast_aggregate_verify(backend, signers, args.repeat)
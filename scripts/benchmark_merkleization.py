@@ -0,0 +1,84 @@
+import time
+
+from eth2spec.capella import mainnet as spec
+from eth2spec.utils.ssz.ssz_merkleization import batched_merkle_root, merkle_root
+
+
+ENGINES = {
+    'remerkleable': merkle_root,
+    'batched': batched_merkle_root,
+}
+
+
+def build_state(validator_count):
+    state = spec.BeaconState()
+    validator = spec.Validator(
+        effective_balance=spec.MAX_EFFECTIVE_BALANCE,
+        activation_epoch=0,
+        exit_epoch=spec.FAR_FUTURE_EPOCH,
+        withdrawable_epoch=spec.FAR_FUTURE_EPOCH,
+    )
+    state.validators = [validator] * validator_count
+    state.balances = [spec.MAX_EFFECTIVE_BALANCE] * validator_count
+    state.inactivity_scores = [0] * validator_count
+    state.previous_epoch_participation = [0] * validator_count
+    state.current_epoch_participation = [0] * validator_count
+    state.hash_tree_root()
+    return state
+
+
+def apply_epoch_changes(state, balances, participation):
+    """
+    The changes of an epoch transition: every balance and participation flag, and some effective balances.
+    """
+    state.balances = balances
+    state.previous_epoch_participation = participation
+    state.current_epoch_participation = [0] * len(participation)
+    for index in range(0, len(state.validators), 64):
+        state.validators[index].effective_balance -= spec.EFFECTIVE_BALANCE_INCREMENT
+
+
+def benchmark_merkleization(state, repeat):
+    """
+    Time the root of the state after the changes of an epoch transition, with each engine.
+    """
+    validator_count = len(state.validators)
+    balances = [spec.MAX_EFFECTIVE_BALANCE + index for index in range(validator_count)]
+    participation = [index % 8 for index in range(validator_count)]
+    roots = set()
+    for engine, merkleize in ENGINES.items():
+        timings = []
+        for _ in range(repeat):
+            # The base state is hashed, the copy only has the dirty nodes of the changes
+            changed_state = state.copy()
+            apply_epoch_changes(changed_state, balances, participation)
+            start = time.perf_counter()
+            roots.add(merkleize(changed_state.get_backing()))
+            timings.append(time.perf_counter() - start)
+        print(f"{engine:>12} {validator_count:>8} validators: {min(timings) * 1000:9.2f} ms")
+    assert len(roots) == 1
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--validators",
+        dest="validators",
+        type=int,
+        nargs='+',
+        default=[2**16, 2**19],
+        help='the numbers of validators of the state',
+    )
+    parser.add_argument(
+        "--repeat",
+        dest="repeat",
+        type=int,
+        default=3,
+        help='the number of roots timed for each engine, the fastest being reported',
+    )
+    args = parser.parse_args()
+
+    for validators in args.validators:
+        benchmark_merkleization(build_state(validators), args.repeat)
@@ -0,0 +1,39 @@
+import numpy as np
+
+from eth2spec.test.context import with_altair_and_later, spec_state_test
+from eth2spec.test.helpers.state import next_epoch
+from eth2spec.utils.packed_array import read_packed_array, write_packed_array
+
+PACKED_FIELDS = (
+    'balances', 'inactivity_scores', 'previous_epoch_participation', 'current_epoch_participation', 'randao_mixes',
+)
+
+
+@with_altair_and_later
+@spec_state_test
+def test_packed_state_fields_round_trip(spec, state):
+    next_epoch(spec, state)
+    for name in PACKED_FIELDS:
+        array = read_packed_array(getattr(state, name))
+        assert [bytes(row) if array.ndim == 2 else int(row) for row in array] == [
+            bytes(value) if array.ndim == 2 else int(value) for value in getattr(state, name)
+        ]
+
+    arrays = {name: read_packed_array(getattr(state, name)).copy() for name in PACKED_FIELDS}
+    arrays['balances'][::3] += np.uint64(spec.EFFECTIVE_BALANCE_INCREMENT)
+    arrays['inactivity_scores'][1] = 7
+    arrays['previous_epoch_participation'][:] = arrays['current_epoch_participation']
+    arrays['current_epoch_participation'][:] = 0
+    arrays['randao_mixes'][spec.get_current_epoch(state) % spec.EPOCHS_PER_HISTORICAL_VECTOR] = 0xaa
+
+    reference_state = state.copy()
+    reference_state.balances = [int(balance) for balance in arrays['balances']]
+    reference_state.inactivity_scores[1] = 7
+    reference_state.previous_epoch_participation = reference_state.current_epoch_participation
+    reference_state.current_epoch_participation = [spec.ParticipationFlags(0)] * len(state.validators)
+    reference_state.randao_mixes[spec.get_current_epoch(state) % spec.EPOCHS_PER_HISTORICAL_VECTOR] = b'\xaa' * 32
+
+    for name in PACKED_FIELDS:
+        write_packed_array(getattr(state, name), arrays[name])
+    assert state.hash_tree_root() == reference_state.hash_tree_root()
+    assert state.hash_tree_root() == spec.BeaconState.decode_bytes(state.encode_bytes()).hash_tree_root()
@@ -0,0 +1,63 @@
+from random import Random
+
+from eth2spec.test.context import with_altair_and_later, spec_state_test
+from eth2spec.test.helpers.random import randomize_state, patch_state_to_non_leaking
+from eth2spec.test.helpers.rewards import leaking
+from eth2spec.test.helpers.state import next_epoch
+
+
+def get_reference_deltas(spec, state):
+    flag_deltas = [
+        spec.get_flag_index_deltas(state, flag_index)
+        for flag_index in range(len(spec.PARTICIPATION_FLAG_WEIGHTS))
+    ]
+    return flag_deltas + [spec.get_inactivity_penalty_deltas(state)]
+
+
+def run_participation_deltas(spec, state):
+    expected_deltas = get_reference_deltas(spec, state)
+    assert [tuple(map(list, deltas)) for deltas in spec.get_participation_deltas(state)] == [
+        tuple(map(list, deltas)) for deltas in expected_deltas
+    ]
+
+    expected_state = state.copy()
+    for (rewards, penalties) in expected_deltas:
+        for index in range(len(expected_state.validators)):
+            spec.increase_balance(expected_state, spec.ValidatorIndex(index), rewards[index])
+            spec.decrease_balance(expected_state, spec.ValidatorIndex(index), penalties[index])
+    spec.process_rewards_and_penalties(state)
+    assert state.balances == expected_state.balances
+
+
+def randomize_participation_state(spec, state, rng):
+    randomize_state(spec, state, rng)
+    for index in range(len(state.validators)):
+        state.inactivity_scores[index] = rng.randint(0, 100)
+    # Some balances that reach zero
+    for index in rng.sample(range(len(state.validators)), 4):
+        state.balances[index] = rng.randint(0, 100)
+
+
+@with_altair_and_later
+@spec_state_test
+def test_participation_deltas_empty(spec, state):
+    next_epoch(spec, state)
+    run_participation_deltas(spec, state)
+
+
+@with_altair_and_later
+@spec_state_test
+def test_participation_deltas_random(spec, state):
+    randomize_participation_state(spec, state, Random(1010))
+    patch_state_to_non_leaking(spec, state)
+    assert not spec.is_in_inactivity_leak(state)
+    run_participation_deltas(spec, state)
+
+
+@with_altair_and_later
+@spec_state_test
+@leaking()
+def test_participation_deltas_random_leaking(spec, state):
+    randomize_participation_state(spec, state, Random(2020))
+    assert spec.is_in_inactivity_leak(state)
+    run_participation_deltas(spec, state)
@@ -0,0 +1,44 @@
+from eth2spec.test.context import always_bls, spec_state_test, with_altair_and_later
+from eth2spec.test.helpers.sync_committee import (
+    compute_aggregate_sync_committee_signature,
+    compute_committee_indices,
+)
+from eth2spec.utils import bls
+
+
+def run_sync_committee_signature_checks(spec, state):
+    committee_indices = compute_committee_indices(state)
+    committee_size = len(committee_indices)
+    slot = state.slot - 1
+    domain = spec.get_domain(state, spec.DOMAIN_SYNC_COMMITTEE, spec.compute_epoch_at_slot(slot))
+    signing_root = spec.compute_signing_root(spec.get_block_root_at_slot(state, slot), domain)
+    bit_patterns = [
+        [True] * committee_size,
+        [index > 1 for index in range(committee_size)],
+        [index % 2 == 0 for index in range(committee_size)],
+        [index < 2 for index in range(committee_size)],
+        [False] * committee_size,
+    ]
+    for bits in bit_patterns:
+        participants = [index for index, bit in zip(committee_indices, bits) if bit]
+        participant_pubkeys = [pubkey for pubkey, bit in zip(state.current_sync_committee.pubkeys, bits) if bit]
+        valid_signature = compute_aggregate_sync_committee_signature(spec, state, slot, participants)
+        other_signature = compute_aggregate_sync_committee_signature(
+            spec, state, slot, participants, block_root=spec.Root(b'\x12' * 32))
+        for signature, expected in ((valid_signature, True), (other_signature, len(participants) == 0)):
+            assert spec.eth_fast_aggregate_verify(participant_pubkeys, signing_root, signature) == expected
+            assert spec.is_valid_sync_committee_signature(
+                state.current_sync_committee, bits, signing_root, signature) == expected
+
+
+@with_altair_and_later
+@spec_state_test
+@always_bls
+def test_sync_committee_signature_matches_fast_aggregate_verify(spec, state):
+    spec.process_slots(state, state.slot + 2)
+    try:
+        for use_backend in (bls.use_fastest, bls.use_milagro):
+            use_backend()
+            run_sync_committee_signature_checks(spec, state)
+    finally:
+        bls.use_fastest()
@@ -0,0 +1,100 @@
+import random
+
+from eth2spec.test.context import with_capella_and_later, spec_state_test
+from eth2spec.test.helpers.state import next_epoch
+from eth2spec.test.helpers.withdrawals import (
+    set_eth1_withdrawal_credential_with_balance,
+    set_validator_fully_withdrawable,
+    set_validator_partially_withdrawable,
+)
+
+
+def reference_get_expected_withdrawals(spec, state):
+    epoch = spec.get_current_epoch(state)
+    withdrawal_index = state.next_withdrawal_index
+    validator_index = state.next_withdrawal_validator_index
+    withdrawals = []
+    bound = min(len(state.validators), spec.MAX_VALIDATORS_PER_WITHDRAWALS_SWEEP)
+    for _ in range(bound):
+        validator = state.validators[validator_index]
+        balance = state.balances[validator_index]
+        if spec.is_fully_withdrawable_validator(validator, balance, epoch):
+            amount = balance
+        elif spec.is_partially_withdrawable_validator(validator, balance):
+            amount = balance - spec.MAX_EFFECTIVE_BALANCE
+        else:
+            amount = None
+        if amount is not None:
+            withdrawals.append(spec.Withdrawal(
+                index=withdrawal_index,
+                validator_index=validator_index,
+                address=spec.ExecutionAddress(validator.withdrawal_credentials[12:]),
+                amount=amount,
+            ))
+            withdrawal_index += spec.WithdrawalIndex(1)
+        if len(withdrawals) == spec.MAX_WITHDRAWALS_PER_PAYLOAD:
+            break
+        validator_index = spec.ValidatorIndex((validator_index + 1) % len(state.validators))
+    return withdrawals
+
+
+def assert_withdrawals_match_reference(spec, state):
+    expected_withdrawals = spec.get_expected_withdrawals(state)
+    assert expected_withdrawals == reference_get_expected_withdrawals(spec, state)
+    rebuilt = spec.withdrawal_candidate_index.build((state.validators, state.balances), None)
+    assert spec.withdrawal_candidate_index.get_candidates(state.validators, state.balances) == rebuilt
+
+
+def randomize_withdrawability(spec, state, rng):
+    for index in rng.sample(range(len(state.validators)), len(state.validators) // 3):
+        kind = rng.randrange(4)
+        if kind == 0:
+            set_validator_fully_withdrawable(spec, state, index)
+        elif kind == 1:
+            set_validator_partially_withdrawable(spec, state, index)
+        elif kind == 2:
+            # Withdrawable in a later epoch
+            set_validator_fully_withdrawable(spec, state, index, spec.get_current_epoch(state) + 2)
+        else:
+            set_eth1_withdrawal_credential_with_balance(spec, state, index, balance=0)
+
+
+@with_capella_and_later
+@spec_state_test
+def test_withdrawal_sweep_matches_reference(spec, state):
+    rng = random.Random(2021)
+    randomize_withdrawability(spec, state, rng)
+    for start in (0, 1, len(state.validators) // 2, len(state.validators) - 1):
+        state.next_withdrawal_validator_index = start
+        assert_withdrawals_match_reference(spec, state)
+
+
+@with_capella_and_later
+@spec_state_test
+def test_withdrawal_sweep_balance_and_credential_changes(spec, state):
+    rng = random.Random(2022)
+    randomize_withdrawability(spec, state, rng)
+    state.next_withdrawal_validator_index = len(state.validators) - 3
+    assert_withdrawals_match_reference(spec, state)
+
+    for _ in range(8):
+        index = rng.randrange(len(state.validators))
+        state.balances[index] = rng.choice([0, spec.MAX_EFFECTIVE_BALANCE, spec.MAX_EFFECTIVE_BALANCE + 1])
+        assert_withdrawals_match_reference(spec, state)
+        set_validator_partially_withdrawable(spec, state, rng.randrange(len(state.validators)))
+        assert_withdrawals_match_reference(spec, state)
+
+    # The withdrawable epochs set ahead are passed
+    for _ in range(3):
+        next_epoch(spec, state)
+        assert_withdrawals_match_reference(spec, state)
+
+
+@with_capella_and_later
+@spec_state_test
+def test_expected_withdrawals_are_copies(spec, state):
+    set_validator_partially_withdrawable(spec, state, 0)
+    state.next_withdrawal_validator_index = 0
+    expected_withdrawals = spec.get_expected_withdrawals(state)
+    expected_withdrawals[0].amount += 1
+    assert spec.get_expected_withdrawals(state) == reference_get_expected_withdrawals(spec, state)
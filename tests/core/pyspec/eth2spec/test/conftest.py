@@ -3,6 +3,7 @@ from eth2spec.test.helpers.constants import (
     ALL_PHASES, ALLOWED_TEST_RUNNER_FORKS
 )
 from eth2spec.utils import bls as bls_utils
+from eth2spec.utils.ssz import ssz_impl
 
 # We import pytest only when it's present, i.e. when we are running tests.
 # The test-cases themselves can be generated without installing pytest.
@@ -43,6 +44,10 @@ def pytest_addoption(parser):
         "--disable-bls", action="store_true", default=False,
         help="bls-default: make tests that are not dependent on BLS run without BLS"
     )
+    parser.addoption(
+        "--proto-array", action="store_true", default=False,
+        help="proto-array: attach the proto-array engine to fork choice stores, check its heads against the reference"
+    )
     parser.addoption(
         "--bls-type", action="store", type=str, default="fastest", choices=["py_ecc", "milagro", "arkworks", "fastest"],
         help=(
@@ -50,6 +55,10 @@ def pytest_addoption(parser):
             "fastest: use milagro for signatures and arkworks for everything else (e.g. KZG)"
         )
     )
+    parser.addoption(
+        "--merkleization", action="store", type=str, default="remerkleable", choices=["remerkleable", "batched"],
+        help="merkleization: use the specified engine behind hash_tree_root"
+    )
 
 
 def _validate_fork_name(forks):
@@ -84,6 +93,11 @@ def bls_default(request):
         context.DEFAULT_BLS_ACTIVE = False
 
 
+@fixture(autouse=True)
+def proto_array_default(request):
+    context.DEFAULT_PROTO_ARRAY_ACTIVE = request.config.getoption("--proto-array")
+
+
 @fixture(autouse=True)
 def bls_type(request):
     bls_type = request.config.getoption("--bls-type")
@@ -97,3 +111,14 @@ def bls_type(request):
         bls_utils.use_fastest()
     else:
         raise Exception(f"unrecognized bls type: {bls_type}")
+
+
+@fixture(autouse=True)
+def merkleization(request):
+    engine = request.config.getoption("--merkleization")
+    if engine == "remerkleable":
+        ssz_impl.use_remerkleable_merkleization()
+    elif engine == "batched":
+        ssz_impl.use_batched_merkleization()
+    else:
+        raise Exception(f"unrecognized merkleization engine: {engine}")
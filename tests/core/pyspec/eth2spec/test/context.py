@@ -219,6 +219,10 @@ def single_phase(fn):
 # - Most tests respect the BLS setting.
 DEFAULT_BLS_ACTIVE = True
 
+# The fork choice stores created by the test helpers use the reference ``get_head`` by default.
+# With `--proto-array`, a proto-array engine is attached instead, and its heads are checked against the reference.
+DEFAULT_PROTO_ARRAY_ACTIVE = False
+
 
 is_pytest = True
 
@@ -1,6 +1,7 @@
 from typing import NamedTuple, Sequence, Any
 
 from eth_utils import encode_hex
+from eth2spec.test import context
 from eth2spec.test.exceptions import BlockNotFoundException
 from eth2spec.test.helpers.attestations import (
     next_epoch_with_attestations,
@@ -121,7 +122,32 @@ def get_genesis_forkchoice_store(spec, genesis_state):
 def get_genesis_forkchoice_store_and_block(spec, genesis_state):
     assert genesis_state.slot == spec.GENESIS_SLOT
     genesis_block = spec.BeaconBlock(state_root=genesis_state.hash_tree_root())
-    return spec.get_forkchoice_store(genesis_state, genesis_block), genesis_block
+    store = spec.get_forkchoice_store(genesis_state, genesis_block)
+    if context.DEFAULT_PROTO_ARRAY_ACTIVE:
+        spec.enable_proto_array(store)
+    return store, genesis_block
+
+
+def check_proto_array_head(spec, store, check_weights=False):
+    """
+    Check that the head of the proto-array attached to ``store`` matches the reference path.
+    With ``check_weights``, the weights of all blocks and the filtered block tree are compared as well.
+    """
+    proto_array = spec.get_proto_array(store)
+    if proto_array is None:
+        return
+    head = spec.get_head(store)
+    if check_weights:
+        weights = {root: spec.get_weight(store, root) for root in store.blocks}
+        filtered_roots = set(spec.get_filtered_block_tree(store).keys())
+    spec.disable_proto_array(store)
+    try:
+        assert head == spec.get_head(store)
+        if check_weights:
+            assert weights == {root: spec.get_weight(store, root) for root in store.blocks}
+            assert filtered_roots == set(spec.get_filtered_block_tree(store).keys())
+    finally:
+        setattr(store, 'proto_array', proto_array)
 
 
 def get_block_file_name(block):
@@ -266,6 +292,7 @@ def add_attester_slashing(spec, store, attester_slashing, test_steps, valid=True
 
 
 def get_formatted_head_output(spec, store):
+    check_proto_array_head(spec, store)
     head = spec.get_head(store)
     slot = store.blocks[head].slot
     return {
@@ -168,6 +168,5 @@ def has_active_balance_differential(spec, state):
     return active_balance // spec.EFFECTIVE_BALANCE_INCREMENT != total_balance // spec.EFFECTIVE_BALANCE_INCREMENT
 
 
-def get_validator_index_by_pubkey(state, pubkey):
-    index = next((i for i, validator in enumerate(state.validators) if validator.pubkey == pubkey), None)
-    return index
+def get_validator_index_by_pubkey(spec, state, pubkey):
+    return spec.get_validator_index_by_pubkey(state, pubkey)
@@ -0,0 +1,36 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.fork_choice import get_genesis_forkchoice_store
+from eth2spec.test.helpers.state import state_transition_and_sign_block
+
+
+@with_all_phases
+@spec_state_test
+def test_checkpoint_state_cache(spec, state):
+    spec.checkpoint_state_cache.clear()
+    stores = [get_genesis_forkchoice_store(spec, state) for _ in range(3)]
+
+    block = build_empty_block_for_next_slot(spec, state)
+    signed_block = state_transition_and_sign_block(spec, state, block)
+    for store in stores:
+        spec.on_tick(store, store.genesis_time + block.slot * spec.config.SECONDS_PER_SLOT)
+        spec.on_block(store, signed_block)
+    targets = [spec.Checkpoint(epoch=epoch, root=block.hash_tree_root()) for epoch in (1, 2)]
+
+    # The first store misses, the second epoch transition resumes from the first checkpoint state
+    stats = spec.get_checkpoint_state_cache_stats()
+    for target in targets:
+        spec.store_target_checkpoint_state(stores[0], target)
+    assert spec.get_checkpoint_state_cache_stats()['misses'] == stats['misses'] + 2
+
+    # The other stores hit
+    for target in targets:
+        spec.store_target_checkpoint_state(stores[1], target)
+    assert spec.get_checkpoint_state_cache_stats()['hits'] == stats['hits'] + 2
+
+    # The cached states match the reference, and are not affected by changes to the store states
+    for target in targets:
+        spec._store_target_checkpoint_state(stores[2], target)
+        assert stores[0].checkpoint_states[target].slot == spec.compute_start_slot_at_epoch(target.epoch)
+        stores[0].checkpoint_states[target].slot += 1
+        assert stores[1].checkpoint_states[target] == stores[2].checkpoint_states[target]
@@ -0,0 +1,40 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.fork_choice import get_genesis_forkchoice_store
+from eth2spec.test.helpers.state import state_transition_and_sign_block
+
+
+def get_children_by_scan(store):
+    return {
+        root: [child for child in store.blocks.keys() if store.blocks[child].parent_root == root]
+        for root in store.blocks.keys()
+    }
+
+
+@with_all_phases
+@spec_state_test
+def test_children_index_on_block(spec, state):
+    store = get_genesis_forkchoice_store(spec, state)
+    anchor_root = store.finalized_checkpoint.root
+    assert spec.get_children_index(store) == get_children_by_scan(store)
+
+    signed_blocks = []
+    for graffiti in (b'\x01', b'\x02', b'\x03'):
+        branch_state = state.copy()
+        for _ in range(2):
+            block = build_empty_block_for_next_slot(spec, branch_state)
+            block.body.graffiti = graffiti * 32
+            signed_blocks.append(state_transition_and_sign_block(spec, branch_state, block))
+
+    spec.on_tick(store, store.genesis_time + 2 * spec.config.SECONDS_PER_SLOT)
+    for signed_block in signed_blocks:
+        spec.on_block(store, signed_block)
+        assert spec.get_children_index(store) == get_children_by_scan(store)
+    # Replaying a block does not duplicate it in the index
+    spec.on_block(store, signed_blocks[0])
+    assert spec.get_children_index(store) == get_children_by_scan(store)
+    assert len(spec.get_children(store, anchor_root)) == 3
+
+    # The index is rebuilt if blocks are removed behind its back
+    del store.blocks[signed_blocks[-1].message.hash_tree_root()]
+    assert spec.get_children_index(store) == get_children_by_scan(store)
@@ -0,0 +1,51 @@
+from eth2spec.test.context import with_all_phases, spec_state_test, always_bls
+from eth2spec.test.helpers.attestations import get_valid_attestation
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.fork_choice import get_genesis_forkchoice_store
+from eth2spec.test.helpers.state import next_slot, state_transition_and_sign_block
+
+
+def run_sequential_on_attestation(spec, store, attestations):
+    results = []
+    for attestation in attestations:
+        try:
+            spec.on_attestation(store, attestation)
+        except AssertionError:
+            results.append(False)
+        else:
+            results.append(True)
+    return results
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_on_attestations_matches_on_attestation(spec, state):
+    stores = [get_genesis_forkchoice_store(spec, state) for _ in range(2)]
+    signed_blocks = []
+    for _ in range(2):
+        block = build_empty_block_for_next_slot(spec, state)
+        signed_blocks.append(state_transition_and_sign_block(spec, state, block))
+    for store in stores:
+        spec.on_tick(store, store.genesis_time + (state.slot + 1) * spec.config.SECONDS_PER_SLOT)
+        for signed_block in signed_blocks:
+            spec.on_block(store, signed_block)
+
+    attestation_1 = get_valid_attestation(spec, state, slot=1, signed=True)
+    attestation_2 = get_valid_attestation(spec, state, slot=2, signed=True)
+    # Signed for another message
+    bad_signature = attestation_2.copy()
+    bad_signature.signature = attestation_1.signature
+    # Not a past slot yet
+    future_state = state.copy()
+    next_slot(spec, future_state)
+    future = get_valid_attestation(spec, future_state, slot=future_state.slot, signed=True)
+    # No participants
+    empty = get_valid_attestation(spec, state, slot=2, filter_participant_set=lambda committee: set())
+    attestations = [attestation_1, bad_signature, attestation_2, future, empty, attestation_1]
+
+    expected = run_sequential_on_attestation(spec, stores[0], attestations)
+    assert expected == [True, False, True, False, False, True]
+    assert spec.on_attestations(stores[1], attestations) == expected
+    assert stores[1].latest_messages == stores[0].latest_messages
+    assert stores[1].checkpoint_states.keys() == stores[0].checkpoint_states.keys()
@@ -0,0 +1,114 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.attestations import get_valid_attestation, next_epoch_with_attestations
+from eth2spec.test.helpers.attester_slashings import get_valid_attester_slashing_by_indices
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.fork_choice import check_proto_array_head, get_genesis_forkchoice_store
+from eth2spec.test.helpers.state import next_slot, state_transition_and_sign_block
+
+
+def tick_to_slot(spec, store, slot):
+    time = store.genesis_time + slot * spec.config.SECONDS_PER_SLOT
+    if store.time < time:
+        spec.on_tick(store, time)
+
+
+def apply_blocks(spec, store, signed_blocks):
+    for signed_block in signed_blocks:
+        tick_to_slot(spec, store, signed_block.message.slot)
+        spec.on_block(store, signed_block)
+        for attestation in signed_block.message.body.attestations:
+            spec.on_attestation(store, attestation, is_from_block=True)
+        check_proto_array_head(spec, store)
+
+
+def check_proto_array_ancestors(spec, store):
+    slots = range(store.blocks[spec.get_head(store)].slot + 1)
+    ancestors = {(root, slot): spec.get_ancestor(store, root, slot) for root in store.blocks for slot in slots}
+    proto_array = spec.get_proto_array(store)
+    spec.disable_proto_array(store)
+    assert ancestors == {(root, slot): spec.get_ancestor(store, root, slot) for root in store.blocks for slot in slots}
+    setattr(store, 'proto_array', proto_array)
+
+
+@with_all_phases
+@spec_state_test
+def test_proto_array_competing_branches(spec, state):
+    store = get_genesis_forkchoice_store(spec, state)
+    spec.enable_proto_array(store)
+    check_proto_array_head(spec, store)
+
+    state_a = state.copy()
+    block_a = build_empty_block_for_next_slot(spec, state_a)
+    signed_block_a = state_transition_and_sign_block(spec, state_a, block_a)
+    state_b = state.copy()
+    block_b = build_empty_block_for_next_slot(spec, state_b)
+    block_b.body.graffiti = b'\x42' * 32
+    signed_block_b = state_transition_and_sign_block(spec, state_b, block_b)
+
+    # Blocks arrive late, no proposer boost
+    tick_to_slot(spec, store, block_a.slot + 1)
+    apply_blocks(spec, store, [signed_block_a, signed_block_b])
+
+    # A vote for branch A
+    attestation_a = get_valid_attestation(spec, state_a, slot=block_a.slot, signed=True)
+    tick_to_slot(spec, store, attestation_a.data.slot + 1)
+    spec.on_attestation(store, attestation_a)
+    check_proto_array_head(spec, store, check_weights=True)
+    assert spec.get_head(store) == block_a.hash_tree_root()
+
+    # More votes for branch B, from the next slot
+    next_slot(spec, state_b)
+    attestation_b = get_valid_attestation(spec, state_b, slot=state_b.slot, signed=True)
+    assert attestation_b.data.beacon_block_root == block_b.hash_tree_root()
+    tick_to_slot(spec, store, attestation_b.data.slot + 1)
+    spec.on_attestation(store, attestation_b)
+    check_proto_array_head(spec, store, check_weights=True)
+
+    # A timely block on branch A gets the proposer boost, until the next slot
+    next_slot(spec, state_a)
+    block_c = build_empty_block_for_next_slot(spec, state_a)
+    tick_to_slot(spec, store, block_c.slot)
+    signed_block_c = state_transition_and_sign_block(spec, state_a, block_c)
+    apply_blocks(spec, store, [signed_block_c])
+    assert store.proposer_boost_root == block_c.hash_tree_root()
+    check_proto_array_head(spec, store, check_weights=True)
+    tick_to_slot(spec, store, block_c.slot + 1)
+    check_proto_array_head(spec, store, check_weights=True)
+
+    # Equivocating voters of branch A lose their weight
+    indices = sorted(spec.get_attesting_indices(state_a, attestation_a.data, attestation_a.aggregation_bits))
+    attester_slashing = get_valid_attester_slashing_by_indices(spec, state, indices, signed_1=True, signed_2=True)
+    spec.on_attester_slashing(store, attester_slashing)
+    check_proto_array_head(spec, store, check_weights=True)
+    check_proto_array_ancestors(spec, store)
+
+
+@with_all_phases
+@spec_state_test
+def test_proto_array_justified_checkpoint_change(spec, state):
+    store = get_genesis_forkchoice_store(spec, state)
+    spec.enable_proto_array(store)
+
+    post_state = state.copy()
+    for _ in range(4):
+        _, signed_blocks, post_state = next_epoch_with_attestations(
+            spec, post_state, True, True)
+        apply_blocks(spec, store, signed_blocks)
+
+    assert store.justified_checkpoint.epoch > spec.GENESIS_EPOCH
+    check_proto_array_head(spec, store, check_weights=True)
+    check_proto_array_ancestors(spec, store)
+    assert spec.get_head(store) == signed_blocks[-1].message.hash_tree_root()
+
+
+@with_all_phases
+@spec_state_test
+def test_proto_array_enabled_on_existing_store(spec, state):
+    store = get_genesis_forkchoice_store(spec, state)
+
+    _, signed_blocks, state = next_epoch_with_attestations(spec, state, True, False)
+    apply_blocks(spec, store, signed_blocks)
+
+    spec.enable_proto_array(store)
+    check_proto_array_head(spec, store, check_weights=True)
+    assert len(spec.get_proto_array(store).proto_array) == len(store.blocks)
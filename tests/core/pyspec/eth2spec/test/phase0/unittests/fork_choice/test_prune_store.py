@@ -0,0 +1,67 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.attestations import next_epoch_with_attestations
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.fork_choice import check_proto_array_head, get_genesis_forkchoice_store
+from eth2spec.test.helpers.state import state_transition_and_sign_block
+
+
+def apply_blocks(spec, stores, signed_blocks):
+    for signed_block in signed_blocks:
+        for store in stores:
+            time = store.genesis_time + signed_block.message.slot * spec.config.SECONDS_PER_SLOT
+            if store.time < time:
+                spec.on_tick(store, time)
+            spec.on_block(store, signed_block)
+            for attestation in signed_block.message.body.attestations:
+                spec.on_attestation(store, attestation, is_from_block=True)
+
+
+@with_all_phases
+@spec_state_test
+def test_prune_store_on_finalization(spec, state):
+    store = get_genesis_forkchoice_store(spec, state)
+    pruned_store = get_genesis_forkchoice_store(spec, state)
+    spec.enable_store_pruning(pruned_store)
+    spec.enable_proto_array(pruned_store)
+
+    # A branch that conflicts with the chain finalized below
+    fork_state = state.copy()
+    fork_block = build_empty_block_for_next_slot(spec, fork_state)
+    fork_block.body.graffiti = b'\x42' * 32
+    signed_fork_block = state_transition_and_sign_block(spec, fork_state, fork_block)
+    apply_blocks(spec, [store, pruned_store], [signed_fork_block])
+
+    post_state = state.copy()
+    for _ in range(4):
+        _, signed_blocks, post_state = next_epoch_with_attestations(spec, post_state, True, True)
+        apply_blocks(spec, [store, pruned_store], signed_blocks)
+
+    assert pruned_store.finalized_checkpoint.epoch > spec.GENESIS_EPOCH
+    assert pruned_store.finalized_checkpoint == store.finalized_checkpoint
+    finalized_root = pruned_store.finalized_checkpoint.root
+    finalized_slot = pruned_store.blocks[finalized_root].slot
+
+    # Only the finalized block and its descendants remain
+    assert fork_block.hash_tree_root() in store.blocks
+    assert fork_block.hash_tree_root() not in pruned_store.blocks
+    assert set(pruned_store.blocks.keys()) == {
+        root for root in store.blocks.keys()
+        if spec.get_ancestor(store, root, finalized_slot) == finalized_root
+    }
+    for mapping in (pruned_store.block_states, pruned_store.block_timeliness, pruned_store.unrealized_justifications):
+        assert set(mapping.keys()) <= set(pruned_store.blocks.keys())
+    assert all(
+        checkpoint.root in pruned_store.blocks and checkpoint.epoch >= pruned_store.finalized_checkpoint.epoch
+        for checkpoint in pruned_store.checkpoint_states.keys()
+    )
+    assert len(spec.get_proto_array(pruned_store).proto_array) == len(pruned_store.blocks)
+    assert spec.get_children_index(pruned_store) == {
+        root: [child for child in pruned_store.blocks.keys() if pruned_store.blocks[child].parent_root == root]
+        for root in pruned_store.blocks.keys()
+    }
+
+    # Fork choice is unaffected
+    assert spec.get_head(pruned_store) == spec.get_head(store)
+    for root in pruned_store.blocks.keys():
+        assert spec.get_weight(pruned_store, root) == spec.get_weight(store, root)
+    check_proto_array_head(spec, pruned_store, check_weights=True)
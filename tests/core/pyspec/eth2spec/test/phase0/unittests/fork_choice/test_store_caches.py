@@ -0,0 +1,47 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.fork_choice import get_genesis_forkchoice_store
+from eth2spec.test.helpers.state import state_transition_and_sign_block
+
+
+def build_branches(spec, state, branch_count, branch_length):
+    signed_blocks = []
+    for branch in range(branch_count):
+        branch_state = state.copy()
+        for _ in range(branch_length):
+            block = build_empty_block_for_next_slot(spec, branch_state)
+            block.body.graffiti = bytes([branch + 1]) * 32
+            signed_blocks.append(state_transition_and_sign_block(spec, branch_state, block))
+    return signed_blocks
+
+
+@with_all_phases
+@spec_state_test
+def test_filtered_block_tree_cache(spec, state):
+    store = get_genesis_forkchoice_store(spec, state)
+    if spec.get_proto_array(store) is not None:
+        # The engine keeps its own filtered block tree
+        return
+    signed_blocks = build_branches(spec, state, 3, 2)
+
+    spec.on_tick(store, store.genesis_time + 2 * spec.config.SECONDS_PER_SLOT)
+    for signed_block in signed_blocks:
+        spec.on_block(store, signed_block)
+        assert spec.get_filtered_block_tree(store) == spec._get_filtered_block_tree(store)
+
+    # Kept across heads while nothing changes
+    spec.get_head(store)
+    filtered_block_tree = store.filtered_block_tree
+    spec.get_head(store)
+    assert store.filtered_block_tree is filtered_block_tree
+
+    # Dropped on a new epoch
+    spec.on_tick(store, store.genesis_time + spec.SLOTS_PER_EPOCH * spec.config.SECONDS_PER_SLOT)
+    assert spec.get_filtered_block_tree(store) == spec._get_filtered_block_tree(store)
+    assert store.filtered_block_tree is not filtered_block_tree
+
+    # And when a checkpoint is changed in place
+    filtered_block_tree = store.filtered_block_tree
+    store.justified_checkpoint.epoch += 1
+    assert spec.get_filtered_block_tree(store) == spec._get_filtered_block_tree(store)
+    assert store.filtered_block_tree is not filtered_block_tree
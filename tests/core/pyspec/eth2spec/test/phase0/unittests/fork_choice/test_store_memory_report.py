@@ -0,0 +1,32 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.fork_choice import get_genesis_forkchoice_store
+from eth2spec.test.helpers.state import state_transition_and_sign_block
+from eth2spec.utils.snapshot import get_sharing_stats, get_store_memory_report
+
+
+@with_all_phases
+@spec_state_test
+def test_store_memory_report(spec, state):
+    store = get_genesis_forkchoice_store(spec, state)
+    for _ in range(3):
+        block = build_empty_block_for_next_slot(spec, state)
+        signed_block = state_transition_and_sign_block(spec, state, block)
+        spec.on_tick(store, store.genesis_time + block.slot * spec.config.SECONDS_PER_SLOT)
+        spec.on_block(store, signed_block)
+
+    report = get_store_memory_report(store)
+    assert {'blocks', 'block_states', 'checkpoint_states', 'total'} <= set(report.keys())
+    # Successive block states share most of their nodes
+    block_states = report['block_states']
+    assert block_states.unique_bytes * 2 < block_states.total_bytes
+    # The genesis checkpoint state is a copy of the anchor state
+    assert report['checkpoint_states'].unique_nodes == 0
+    assert report['total'].unique_bytes < report['total'].total_bytes
+
+    # Each block state is a copy of the state of its parent, with the changes of one slot
+    head_state = store.block_states[block.hash_tree_root()]
+    parent_state = store.block_states[block.parent_root]
+    stats = get_sharing_stats(head_state, parent_state)
+    assert stats.shared_fraction > 0.5
+    assert stats.unique_nodes > 0
@@ -0,0 +1,65 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.deposits import prepare_state_and_deposit
+from eth2spec.test.helpers.state import next_epoch
+
+
+def assert_totals_match_reference(spec, state):
+    active_validator_indices = spec.get_active_validator_indices(state, spec.get_current_epoch(state))
+    assert spec.get_total_active_balance(state) == spec._get_total_active_balance(state)
+    assert spec.get_validator_churn_limit(state) == max(
+        spec.config.MIN_PER_EPOCH_CHURN_LIMIT,
+        spec.uint64(len(active_validator_indices)) // spec.config.CHURN_LIMIT_QUOTIENT,
+    )
+
+
+def run_with_debug_checks(spec, fn):
+    spec.active_balance_totals.debug = True
+    try:
+        fn()
+    finally:
+        spec.active_balance_totals.debug = False
+
+
+@with_all_phases
+@spec_state_test
+def test_active_balance_totals_registry_changes(spec, state):
+    def run():
+        assert_totals_match_reference(spec, state)
+
+        state.validators[1].effective_balance -= spec.EFFECTIVE_BALANCE_INCREMENT
+        assert_totals_match_reference(spec, state)
+
+        spec.initiate_validator_exit(state, 2)
+        assert_totals_match_reference(spec, state)
+
+        spec.slash_validator(state, 3)
+        assert_totals_match_reference(spec, state)
+
+        validator_count = len(state.validators)
+        deposit = prepare_state_and_deposit(spec, state, validator_count, spec.MAX_EFFECTIVE_BALANCE, signed=True)
+        spec.process_deposit(state, deposit)
+        assert len(state.validators) == validator_count + 1
+        assert_totals_match_reference(spec, state)
+
+        # Exits and activations take effect in later epochs
+        for _ in range(spec.MAX_SEED_LOOKAHEAD + 2):
+            next_epoch(spec, state)
+            assert_totals_match_reference(spec, state)
+
+    run_with_debug_checks(spec, run)
+
+
+@with_all_phases
+@spec_state_test
+def test_active_balance_totals_diverging_states(spec, state):
+    def run():
+        other_state = state.copy()
+        for index in range(len(state.validators) // 2):
+            other_state.validators[index].effective_balance = 0
+        assert_totals_match_reference(spec, other_state)
+        assert_totals_match_reference(spec, state)
+        other_state.validators[0].exit_epoch = spec.get_current_epoch(state)
+        assert_totals_match_reference(spec, other_state)
+        assert_totals_match_reference(spec, state)
+
+    run_with_debug_checks(spec, run)
@@ -0,0 +1,114 @@
+from eth2spec.test.context import always_bls, expect_assertion_error, spec_state_test, with_all_phases
+from eth2spec.test.helpers.attestations import get_valid_attestation
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot, sign_block
+from eth2spec.test.helpers.deposits import prepare_state_and_deposit
+from eth2spec.test.helpers.state import next_epoch, next_slots, state_transition_and_sign_block
+from eth2spec.utils import bls
+
+
+def build_block_with_attestations(spec, state):
+    next_epoch(spec, state)
+    attestations = [
+        get_valid_attestation(spec, state, index=0, signed=True),
+        get_valid_attestation(spec, state, index=0, signed=True,
+                              filter_participant_set=lambda committee: set(sorted(committee)[:1])),
+    ]
+    next_slots(spec, state, spec.MIN_ATTESTATION_INCLUSION_DELAY)
+    block = build_empty_block_for_next_slot(spec, state)
+    for attestation in attestations:
+        block.body.attestations.append(attestation)
+    return block
+
+
+def sign_invalid_block(spec, state, block):
+    # The block is invalid, the state root does not matter
+    proposer_state = state.copy()
+    spec.process_slots(proposer_state, block.slot)
+    return sign_block(spec, proposer_state, block)
+
+
+def run_deferred_state_transition(spec, state, signed_block, valid=True):
+    reference_state = state.copy()
+    deferred_state = state.copy()
+    if valid:
+        spec.state_transition(reference_state, signed_block)
+        spec.state_transition_with_deferred_signatures(deferred_state, signed_block)
+    else:
+        expect_assertion_error(lambda: spec.state_transition(reference_state, signed_block))
+        expect_assertion_error(lambda: spec.state_transition_with_deferred_signatures(deferred_state, signed_block))
+    assert deferred_state.hash_tree_root() == reference_state.hash_tree_root()
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_deferred_signatures_valid_block(spec, state):
+    block = build_block_with_attestations(spec, state)
+    signed_block = state_transition_and_sign_block(spec, state.copy(), block)
+
+    # The proposer signature, the randao reveal and the attestations are checked in one batch
+    with bls.deferred_signature_checks() as signature_sets:
+        spec.state_transition(state.copy(), signed_block)
+    assert len(signature_sets) == 2 + len(block.body.attestations)
+    assert bls.FastAggregateVerifyMultiple(signature_sets)
+    run_deferred_state_transition(spec, state, signed_block)
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_deferred_signatures_invalid_attestation_signature(spec, state):
+    block = build_block_with_attestations(spec, state)
+    block.body.attestations[0].signature = block.body.attestations[1].signature
+    run_deferred_state_transition(spec, state, sign_invalid_block(spec, state, block), valid=False)
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_deferred_signatures_invalid_randao_reveal(spec, state):
+    block = build_block_with_attestations(spec, state)
+    block.body.randao_reveal = bls.G2_POINT_AT_INFINITY
+    run_deferred_state_transition(spec, state, sign_invalid_block(spec, state, block), valid=False)
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_deferred_signatures_invalid_deposit_signature(spec, state):
+    validator_count = len(state.validators)
+    deposit = prepare_state_and_deposit(spec, state, validator_count, spec.MAX_EFFECTIVE_BALANCE, signed=False)
+    block = build_empty_block_for_next_slot(spec, state)
+    block.body.deposits.append(deposit)
+    signed_block = state_transition_and_sign_block(spec, state.copy(), block)
+
+    # The deposit signature is checked right away, it skips the deposit without failing the block
+    with bls.deferred_signature_checks() as signature_sets:
+        post_state = state.copy()
+        spec.state_transition(post_state, signed_block)
+    assert len(signature_sets) == 2
+    assert len(post_state.validators) == validator_count
+    run_deferred_state_transition(spec, state, signed_block)
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_deferred_signatures_process_pool(spec, state):
+    block = build_block_with_attestations(spec, state)
+    signed_block = state_transition_and_sign_block(spec, state.copy(), block)
+    with bls.deferred_signature_checks() as signature_sets:
+        spec.state_transition(state.copy(), signed_block)
+    invalid_signature_sets = list(signature_sets)
+    pubkeys, message, _ = invalid_signature_sets[-1]
+    invalid_signature_sets[-1] = (pubkeys, message, invalid_signature_sets[0][2])
+
+    try:
+        bls.use_signature_process_pool(2)
+        assert bls.FastAggregateVerifyMultiple(signature_sets)
+        assert not bls.FastAggregateVerifyMultiple(invalid_signature_sets)
+        run_deferred_state_transition(spec, state, signed_block)
+        block.body.attestations[0].signature = block.body.attestations[1].signature
+        run_deferred_state_transition(spec, state, sign_invalid_block(spec, state, block), valid=False)
+    finally:
+        bls.use_serial_signature_checks()
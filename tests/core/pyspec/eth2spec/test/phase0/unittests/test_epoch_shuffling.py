@@ -0,0 +1,50 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.state import next_epoch
+
+
+def assert_committees_match_reference(spec, state, epoch):
+    start_slot = spec.compute_start_slot_at_epoch(epoch)
+    for slot in range(start_slot, start_slot + spec.SLOTS_PER_EPOCH):
+        for index in range(spec.get_committee_count_per_slot(state, epoch)):
+            assert spec.get_beacon_committee(state, slot, index) == spec._get_beacon_committee(state, slot, index)
+
+
+@with_all_phases
+@spec_state_test
+def test_epoch_shuffling_matches_committees(spec, state):
+    next_epoch(spec, state)
+    for epoch in (spec.get_previous_epoch(state), spec.get_current_epoch(state), spec.get_current_epoch(state) + 1):
+        assert_committees_match_reference(spec, state, epoch)
+
+
+@with_all_phases
+@spec_state_test
+def test_epoch_shuffling_shared_across_registry_changes(spec, state):
+    epoch = spec.get_current_epoch(state)
+    epoch_shuffling = spec.get_epoch_shuffling(state, epoch)
+
+    # A registry change that keeps the active validators reuses the shuffling
+    state.validators[0].effective_balance -= spec.EFFECTIVE_BALANCE_INCREMENT
+    assert spec.get_epoch_shuffling(state, epoch) is epoch_shuffling
+    assert spec.get_epoch_shuffling(state.copy(), epoch) is epoch_shuffling
+
+    # A change of the active validators does not
+    state.validators[1].exit_epoch = epoch
+    new_epoch_shuffling = spec.get_epoch_shuffling(state, epoch)
+    assert new_epoch_shuffling is not epoch_shuffling
+    assert len(new_epoch_shuffling.active_validator_indices) == len(epoch_shuffling.active_validator_indices) - 1
+    assert_committees_match_reference(spec, state, epoch)
+
+
+@with_all_phases
+@spec_state_test
+def test_epoch_shuffling_cache_size(spec, state):
+    epoch = spec.get_current_epoch(state)
+    try:
+        spec.set_epoch_shuffling_cache_size(1)
+        spec.get_epoch_shuffling(state, epoch)
+        spec.get_epoch_shuffling(state, epoch + 1)
+        assert len(spec.epoch_shuffling_cache) == 1
+        assert_committees_match_reference(spec, state, epoch)
+    finally:
+        spec.set_epoch_shuffling_cache_size(spec.SLOTS_PER_EPOCH)
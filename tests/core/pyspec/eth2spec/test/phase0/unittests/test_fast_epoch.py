@@ -0,0 +1,76 @@
+from random import Random
+
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.forks import is_post_altair
+from eth2spec.test.helpers.random import randomize_state, patch_state_to_non_leaking
+from eth2spec.test.helpers.rewards import leaking
+from eth2spec.test.helpers.state import next_epoch
+from eth2spec.utils import fast_epoch
+
+
+def randomize_epoch_inputs(spec, state, rng):
+    randomize_state(spec, state, rng, exit_fraction=0.1, slash_fraction=0.1)
+    current_epoch = spec.get_current_epoch(state)
+    for index in range(len(state.validators)):
+        # Balances around the hysteresis thresholds, and some to eject
+        delta = rng.randint(-2, 2) * int(spec.EFFECTIVE_BALANCE_INCREMENT) // 3
+        state.balances[index] = max(0, int(state.balances[index]) + delta)
+        if rng.randrange(10) == 0:
+            state.validators[index].effective_balance = spec.config.EJECTION_BALANCE
+        # Slashed validators that are penalized in one of the next two epochs
+        if state.validators[index].slashed:
+            state.validators[index].withdrawable_epoch = (
+                current_epoch + rng.randint(0, 2) + spec.EPOCHS_PER_SLASHINGS_VECTOR // 2)
+        if is_post_altair(spec):
+            state.inactivity_scores[index] = rng.randint(0, 100)
+    for index in range(len(state.slashings)):
+        state.slashings[index] = rng.randint(0, 4) * spec.MAX_EFFECTIVE_BALANCE
+
+
+def run_fast_epoch_differential(spec, state, epochs=2):
+    for _ in range(epochs):
+        reference_state = state.copy()
+        next_epoch(spec, reference_state)
+        fast_epoch.enable(spec)
+        try:
+            next_epoch(spec, state)
+        finally:
+            fast_epoch.disable(spec)
+        assert state.hash_tree_root() == reference_state.hash_tree_root()
+
+
+@with_all_phases
+@spec_state_test
+def test_fast_epoch_matches_process_epoch(spec, state):
+    run_fast_epoch_differential(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_fast_epoch_matches_process_epoch_random(spec, state):
+    randomize_epoch_inputs(spec, state, Random(2024))
+    patch_state_to_non_leaking(spec, state)
+    assert not spec.is_in_inactivity_leak(state)
+    run_fast_epoch_differential(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+@leaking()
+def test_fast_epoch_matches_process_epoch_random_leaking(spec, state):
+    randomize_epoch_inputs(spec, state, Random(4202))
+    assert spec.is_in_inactivity_leak(state)
+    run_fast_epoch_differential(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_fast_epoch_enable_disable(spec, state):
+    reference_fn = spec.process_slashings
+    fast_epoch.enable(spec)
+    fast_epoch.enable(spec)
+    assert fast_epoch.is_enabled(spec)
+    assert spec.process_slashings is not reference_fn
+    fast_epoch.disable(spec)
+    assert not fast_epoch.is_enabled(spec)
+    assert spec.process_slashings is reference_fn
@@ -0,0 +1,53 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.block import build_empty_block_for_next_slot
+from eth2spec.test.helpers.state import next_slots, state_transition_and_sign_block
+
+
+def reference_process_slots(spec, state, slot):
+    while state.slot < slot:
+        spec.process_slot(state)
+        if (state.slot + 1) % spec.SLOTS_PER_EPOCH == 0:
+            spec.process_epoch(state)
+        state.slot = spec.Slot(state.slot + 1)
+
+
+def assert_process_slots_matches_reference(spec, state, slot):
+    reference_state = state.copy()
+    reference_process_slots(spec, reference_state, slot)
+    fast_forward_state = state.copy()
+    spec.process_slots(fast_forward_state, slot)
+    assert fast_forward_state.encode_bytes() == reference_state.encode_bytes()
+    assert fast_forward_state.hash_tree_root() == reference_state.hash_tree_root()
+
+
+@with_all_phases
+@spec_state_test
+def test_fast_forward_within_epoch(spec, state):
+    for count in (1, 2, spec.SLOTS_PER_EPOCH - 1):
+        assert_process_slots_matches_reference(spec, state, state.slot + count)
+
+
+@with_all_phases
+@spec_state_test
+def test_fast_forward_across_epochs(spec, state):
+    next_slots(spec, state, 3)
+    for count in (spec.SLOTS_PER_EPOCH - 3, spec.SLOTS_PER_EPOCH, spec.SLOTS_PER_EPOCH * 2 + 1):
+        assert_process_slots_matches_reference(spec, state, state.slot + count)
+
+
+@with_all_phases
+@spec_state_test
+def test_fast_forward_after_block(spec, state):
+    block = build_empty_block_for_next_slot(spec, state)
+    state_transition_and_sign_block(spec, state, block)
+    # The first slot after the block fills the state root of the latest block header
+    assert state.latest_block_header.state_root == spec.Bytes32()
+    for count in (1, 5, spec.SLOTS_PER_EPOCH + 2):
+        assert_process_slots_matches_reference(spec, state, state.slot + count)
+
+
+@with_all_phases
+@spec_state_test
+def test_fast_forward_ring_buffer_wrap(spec, state):
+    next_slots(spec, state, spec.SLOTS_PER_HISTORICAL_ROOT - 2)
+    assert_process_slots_matches_reference(spec, state, state.slot + 4)
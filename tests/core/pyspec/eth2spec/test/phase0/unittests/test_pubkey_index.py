@@ -0,0 +1,52 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.deposits import prepare_state_and_deposit
+from eth2spec.test.helpers.keys import pubkeys
+
+
+def assert_indices_match_registry(spec, state, queried_pubkeys):
+    registry_pubkeys = [validator.pubkey for validator in state.validators]
+    for pubkey in queried_pubkeys:
+        expected = registry_pubkeys.index(pubkey) if pubkey in registry_pubkeys else None
+        assert spec.get_validator_index_by_pubkey(state, pubkey) == expected
+
+
+@with_all_phases
+@spec_state_test
+def test_pubkey_index_lookups(spec, state):
+    validator_count = len(state.validators)
+    assert_indices_match_registry(spec, state, pubkeys[:validator_count + 2])
+    assert spec.get_registered_validator_index(state, pubkeys[3]) == 3
+    try:
+        spec.get_registered_validator_index(state, pubkeys[validator_count])
+        assert False
+    except ValueError:
+        pass
+
+
+@with_all_phases
+@spec_state_test
+def test_pubkey_index_new_deposit(spec, state):
+    validator_count = len(state.validators)
+    pre_state = state.copy()
+    deposit = prepare_state_and_deposit(spec, state, validator_count, spec.MAX_EFFECTIVE_BALANCE, signed=True)
+    spec.process_deposit(state, deposit)
+
+    assert len(state.validators) == validator_count + 1
+    assert spec.get_validator_index_by_pubkey(state, pubkeys[validator_count]) == validator_count
+    # Copies and ancestors of the state share the map
+    assert spec.get_validator_index_by_pubkey(state.copy(), pubkeys[validator_count]) == validator_count
+    assert spec.get_validator_index_by_pubkey(pre_state, pubkeys[validator_count]) is None
+    assert_indices_match_registry(spec, pre_state, pubkeys[:validator_count + 1])
+
+
+@with_all_phases
+@spec_state_test
+def test_pubkey_index_other_registry(spec, state):
+    assert_indices_match_registry(spec, state, pubkeys[:len(state.validators)])
+
+    # A registry with other validators at the same indices
+    other_state = state.copy()
+    other_state.validators[0].pubkey, other_state.validators[1].pubkey = pubkeys[1], pubkeys[0]
+    other_state.validators[2].pubkey = pubkeys[len(state.validators)]
+    assert_indices_match_registry(spec, other_state, pubkeys[:len(state.validators) + 1])
+    assert_indices_match_registry(spec, state, pubkeys[:len(state.validators) + 1])
@@ -0,0 +1,106 @@
+from eth2spec.test.context import with_all_phases, spec_state_test
+from eth2spec.test.helpers.forks import is_post_deneb
+from eth2spec.test.helpers.state import next_epoch
+
+
+def reference_initiate_validator_exit(spec, state, index):
+    validator = state.validators[index]
+    if validator.exit_epoch != spec.FAR_FUTURE_EPOCH:
+        return
+    exit_epochs = [v.exit_epoch for v in state.validators if v.exit_epoch != spec.FAR_FUTURE_EPOCH]
+    exit_queue_epoch = max(exit_epochs + [spec.compute_activation_exit_epoch(spec.get_current_epoch(state))])
+    exit_queue_churn = len([v for v in state.validators if v.exit_epoch == exit_queue_epoch])
+    if exit_queue_churn >= spec.get_validator_churn_limit(state):
+        exit_queue_epoch += spec.Epoch(1)
+    validator.exit_epoch = exit_queue_epoch
+    validator.withdrawable_epoch = spec.Epoch(validator.exit_epoch + spec.config.MIN_VALIDATOR_WITHDRAWABILITY_DELAY)
+
+
+def reference_process_registry_updates(spec, state):
+    for index, validator in enumerate(state.validators):
+        if spec.is_eligible_for_activation_queue(validator):
+            validator.activation_eligibility_epoch = spec.get_current_epoch(state) + 1
+        if (
+            spec.is_active_validator(validator, spec.get_current_epoch(state))
+            and validator.effective_balance <= spec.config.EJECTION_BALANCE
+        ):
+            reference_initiate_validator_exit(spec, state, index)
+    activation_queue = sorted([
+        index for index, validator in enumerate(state.validators)
+        if spec.is_eligible_for_activation(state, validator)
+    ], key=lambda index: (state.validators[index].activation_eligibility_epoch, index))
+    if is_post_deneb(spec):
+        churn_limit = spec.get_validator_activation_churn_limit(state)
+    else:
+        churn_limit = spec.get_validator_churn_limit(state)
+    for index in activation_queue[:churn_limit]:
+        state.validators[index].activation_epoch = spec.compute_activation_exit_epoch(spec.get_current_epoch(state))
+
+
+def assert_queues_match_registry(spec, state):
+    queues = spec.get_registry_queues(state)
+    rebuilt = spec.registry_queue_index.build((state.validators,), spec.config.EJECTION_BALANCE)
+    assert queues.exit_churn == rebuilt.exit_churn
+    assert queues.exit_epochs == rebuilt.exit_epochs
+    assert queues.activation_queue == rebuilt.activation_queue
+    assert queues.eligibility_candidates == rebuilt.eligibility_candidates
+    assert queues.ejection_candidates == rebuilt.ejection_candidates
+
+
+def assert_registry_updates_match_reference(spec, state):
+    reference_state = state.copy()
+    reference_process_registry_updates(spec, reference_state)
+    spec.process_registry_updates(state)
+    assert state.hash_tree_root() == reference_state.hash_tree_root()
+    assert_queues_match_registry(spec, state)
+
+
+def make_pending_validators(spec, state, count):
+    # Deposited validators, not yet in the activation queue
+    for index in range(count):
+        validator = state.validators[index]
+        validator.activation_eligibility_epoch = spec.FAR_FUTURE_EPOCH
+        validator.activation_epoch = spec.FAR_FUTURE_EPOCH
+
+
+@with_all_phases
+@spec_state_test
+def test_registry_queues_activations_and_ejections(spec, state):
+    churn_limit = spec.get_validator_churn_limit(state)
+    make_pending_validators(spec, state, churn_limit * 2 + 1)
+    # More ejections than the exit churn limit
+    for index in range(len(state.validators) - churn_limit - 2, len(state.validators)):
+        state.validators[index].effective_balance = spec.config.EJECTION_BALANCE
+    assert_queues_match_registry(spec, state)
+
+    for _ in range(4):
+        next_epoch(spec, state)
+        state.finalized_checkpoint.epoch = spec.get_previous_epoch(state)
+        assert_registry_updates_match_reference(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_registry_queues_exit_churn(spec, state):
+    churn_limit = spec.get_validator_churn_limit(state)
+    reference_state = state.copy()
+    for index in range(churn_limit * 3 + 1):
+        spec.initiate_validator_exit(state, index)
+        reference_initiate_validator_exit(spec, reference_state, index)
+        assert state.validators[index].exit_epoch == reference_state.validators[index].exit_epoch
+    assert state.hash_tree_root() == reference_state.hash_tree_root()
+    assert_queues_match_registry(spec, state)
+
+
+@with_all_phases
+@spec_state_test
+def test_registry_queues_diverging_states(spec, state):
+    other_state = state.copy()
+    make_pending_validators(spec, other_state, 4)
+    other_state.validators[5].exit_epoch = spec.get_current_epoch(state) + 10
+    assert_queues_match_registry(spec, other_state)
+    assert_queues_match_registry(spec, state)
+    other_state.validators[5].exit_epoch = spec.FAR_FUTURE_EPOCH
+    other_state.validators[6].effective_balance = spec.config.EJECTION_BALANCE
+    assert_queues_match_registry(spec, other_state)
+    assert_queues_match_registry(spec, state)
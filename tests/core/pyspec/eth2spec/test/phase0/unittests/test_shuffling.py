@@ -0,0 +1,40 @@
+import random
+
+from eth2spec.test.context import (
+    spec_state_test,
+    spec_test,
+    single_phase,
+    with_all_phases,
+)
+
+
+@with_all_phases
+@spec_test
+@single_phase
+def test_compute_shuffled_indices(spec):
+    rng = random.Random(1234)
+    for _ in range(3):
+        seed = spec.Bytes32(bytes(rng.randint(0, 255) for _ in range(32)))
+        for count in [0, 1, 2, 3, 5, 10, 33, 100, 1000]:
+            assert spec.compute_shuffled_indices(spec.uint64(count), seed) == [
+                spec._compute_shuffled_index(spec.uint64(i), spec.uint64(count), seed) for i in range(count)
+            ]
+
+
+@with_all_phases
+@spec_state_test
+def test_committees_match_per_index_shuffling(spec, state):
+    spec.shuffling_cache.clear()
+    epoch = spec.get_current_epoch(state)
+    indices = spec.get_active_validator_indices(state, epoch)
+    seed = spec.get_seed(state, epoch, spec.DOMAIN_BEACON_ATTESTER)
+    count = spec.get_committee_count_per_slot(state, epoch) * spec.SLOTS_PER_EPOCH
+    for index in range(count):
+        assert spec.compute_committee(indices, seed, index, count) == spec._compute_committee(
+            indices, seed, index, count)
+    assert (spec.uint64(len(indices)), seed) in spec.shuffling_cache
+
+    # Lookups of single positions are served from the cached shuffling
+    for i in range(len(indices)):
+        assert spec.compute_shuffled_index(spec.uint64(i), spec.uint64(len(indices)), seed) == (
+            spec._compute_shuffled_index(spec.uint64(i), spec.uint64(len(indices)), seed))
@@ -0,0 +1,55 @@
+from eth2spec.test.context import always_bls, spec_state_test, with_all_phases
+from eth2spec.test.helpers.attestations import get_valid_attestation
+from eth2spec.test.helpers.keys import pubkeys
+from eth2spec.test.helpers.state import next_slot
+from eth2spec.utils import bls
+
+
+def run_indexed_attestation_checks(spec, state, indexed_attestation):
+    indices = indexed_attestation.attesting_indices
+    attesting_pubkeys = [state.validators[i].pubkey for i in indices]
+    domain = spec.get_domain(state, spec.DOMAIN_BEACON_ATTESTER, indexed_attestation.data.target.epoch)
+    signing_root = spec.compute_signing_root(indexed_attestation.data, domain)
+    for message, expected in ((signing_root, True), (b'\x12' * 32, False)):
+        assert bls.FastAggregateVerify(attesting_pubkeys, message, indexed_attestation.signature) == expected
+        assert bls.FastAggregateVerifyIndexed(
+            indices, attesting_pubkeys, message, indexed_attestation.signature) == expected
+    assert spec.is_valid_indexed_attestation(state, indexed_attestation)
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_validator_pubkey_cache_across_backends(spec, state):
+    attestation = get_valid_attestation(spec, state, signed=True)
+    next_slot(spec, state)
+    indexed_attestation = spec.get_indexed_attestation(state, attestation)
+    try:
+        for use_backend in (bls.use_fastest, bls.use_milagro, bls.use_arkworks, bls.use_py_ecc):
+            use_backend()
+            run_indexed_attestation_checks(spec, state, indexed_attestation)
+    finally:
+        bls.use_fastest()
+
+
+@with_all_phases
+@spec_state_test
+@always_bls
+def test_validator_pubkey_cache_registry_changes(spec, state):
+    attestation = get_valid_attestation(spec, state, signed=True)
+    next_slot(spec, state)
+    indexed_attestation = spec.get_indexed_attestation(state, attestation)
+    run_indexed_attestation_checks(spec, state, indexed_attestation)
+    index = indexed_attestation.attesting_indices[0]
+
+    # Another pubkey at the same index replaces the cached point
+    other_state = state.copy()
+    other_state.validators[index].pubkey = pubkeys[len(state.validators)]
+    assert not spec.is_valid_indexed_attestation(other_state, indexed_attestation)
+    assert spec.is_valid_indexed_attestation(state, indexed_attestation)
+
+    # A pubkey failing KeyValidate fails the check
+    other_state.validators[index].pubkey = b'\x00' * 48
+    assert not spec.is_valid_indexed_attestation(other_state, indexed_attestation)
+    assert bls.get_validator_pubkey_point(index, other_state.validators[index].pubkey) is None
+    assert spec.is_valid_indexed_attestation(state, indexed_attestation)
@@ -0,0 +1,172 @@
+from typing import Any, Dict, Hashable, Iterable, Iterator, Optional, Sequence, Tuple
+
+from lru import LRU
+from remerkleable.core import View
+from remerkleable.readonly_iters import NodeIter
+from remerkleable.tree import Node, zero_node
+
+# Chunks of the validator fields the totals depend on, in the depth 3 tree of a validator
+EFFECTIVE_BALANCE_GINDEX = 2**3 + 2
+ACTIVATION_EPOCH_GINDEX = 2**3 + 5
+EXIT_EPOCH_GINDEX = 2**3 + 6
+
+
+def read_uint64(node: Node, gindex: int) -> int:
+    return int.from_bytes(node.getter(gindex).root[:8], 'little')
+
+
+def is_validator(node: Node) -> bool:
+    # Zero chunks past the end of the registry are leaves
+    return not node.is_leaf()
+
+
+def get_validator_contribution(node: Node, epoch: int) -> Tuple[int, int]:
+    """
+    Return ``(1, effective balance)`` if the validator with backing ``node`` is active at ``epoch``, ``(0, 0)`` else.
+    """
+    if not is_validator(node):
+        return 0, 0
+    if read_uint64(node, ACTIVATION_EPOCH_GINDEX) <= epoch < read_uint64(node, EXIT_EPOCH_GINDEX):
+        return 1, read_uint64(node, EFFECTIVE_BALANCE_GINDEX)
+    return 0, 0
+
+
+def iter_changed_validators(previous: Node, current: Node, depth: int,
+                            index: int = 0) -> Iterator[Tuple[int, Node, Node]]:
+    """
+    Iterate over the validators with another backing in ``current`` than in ``previous``, two registry subtrees
+    of ``depth``. Subtrees shared by both are skipped by identity, without hashing.
+    """
+    if previous is current:
+        return
+    # Collapsed subtrees are not always the shared zero nodes, but their root is at hand
+    if previous.is_leaf() and current.is_leaf() and previous.root == current.root:
+        return
+    if depth == 0:
+        yield index, previous, current
+        return
+    # Zero subtrees are collapsed into a single node
+    previous_left, previous_right = (
+        (zero_node(depth - 1),) * 2 if previous.is_leaf() else (previous.get_left(), previous.get_right()))
+    current_left, current_right = (
+        (zero_node(depth - 1),) * 2 if current.is_leaf() else (current.get_left(), current.get_right()))
+    yield from iter_changed_validators(previous_left, current_left, depth - 1, index << 1)
+    yield from iter_changed_validators(previous_right, current_right, depth - 1, (index << 1) | 1)
+
+
+def iter_list_changes(previous_backing: Node, values: View) -> Iterator[Tuple[int, Node, Node]]:
+    """
+    Iterate over the elements, or the chunks of packed elements, with another backing in the list ``values``
+    than in the list with backing ``previous_backing``.
+    """
+    # The left subtrees hold the elements, the right nodes their number
+    return iter_changed_validators(
+        previous_backing.get_left(), values.get_backing().get_left(), values.contents_depth())
+
+
+def collect_changes(changes: Iterable[Tuple[int, Any]], max_changes: int) -> Optional[Dict[int, Any]]:
+    """
+    Return the ``(index, change)`` pairs of ``changes`` by index, the first change of an index being kept,
+    or ``None`` once more than ``max_changes`` indices change.
+    """
+    changed: Dict[int, Any] = {}
+    for index, change in changes:
+        changed.setdefault(index, change)
+        if len(changed) > max_changes:
+            return None
+    return changed
+
+
+class RegistryIndex(object):
+    """
+    Values derived from the validator registry, and from other lists of the state, by their backings and a key.
+
+    Registry changes, exits and balance updates all replace the backing of the changed elements only,
+    so the value for some lists is carried over from the last one computed with the same key,
+    reading just the validators that differ. The value is computed in full when there is no such value,
+    or when more than a quarter of the validators differ.
+    Subclasses implement ``build`` and ``update``, and ``iter_changes`` if other lists than the registry,
+    always the first of the lists, are diffed.
+    """
+
+    def __init__(self, cache_size: int = 16, latest_size: int = 4) -> None:
+        # Values by (list backings, key)
+        self.values = LRU(size=cache_size)
+        # The last (list backings, value) by key
+        self.latest = LRU(size=latest_size)
+
+    def get_value(self, lists: Sequence[View], key: Hashable) -> Any:
+        backings = tuple(values.get_backing() for values in lists)
+        value = self.values.get((backings, key))
+        if value is None:
+            if key in self.latest:
+                previous_backings, previous_value = self.latest[key]
+                changes = collect_changes(self.iter_changes(previous_backings, lists), len(lists[0]) // 4)
+                if changes is not None:
+                    value = self.update(previous_value, changes, lists, key)
+            if value is None:
+                value = self.build(lists, key)
+            self.values[(backings, key)] = value
+        self.latest[key] = (backings, value)
+        return value
+
+    def iter_changes(self, previous_backings: Sequence[Node], lists: Sequence[View]) -> Iterator[Tuple[int, Any]]:
+        """
+        Iterate over ``(index, (previous backing, current backing))`` of the validators that differ.
+        """
+        for index, previous, current in iter_list_changes(previous_backings[0], lists[0]):
+            yield index, (previous, current)
+
+    def build(self, lists: Sequence[View], key: Hashable) -> Any:
+        raise NotImplementedError
+
+    def update(self, value: Any, changes: Dict[int, Any], lists: Sequence[View], key: Hashable) -> Any:
+        """
+        Return the value for ``lists`` from ``value``, the one for the previous lists, and ``changes``
+        from ``iter_changes`` by index.
+        """
+        raise NotImplementedError
+
+
+def sum_active_balances(validators: View, epoch: int) -> Tuple[int, int]:
+    count, total = 0, 0
+    for node in NodeIter(validators.get_backing(), validators.tree_depth(), validators.length()):
+        active, effective_balance = get_validator_contribution(node, epoch)
+        count += active
+        total += effective_balance
+    return count, total
+
+
+def naive_sum_active_balances(validators: View, epoch: int) -> Tuple[int, int]:
+    active_validators = [v for v in validators if v.activation_epoch <= epoch < v.exit_epoch]
+    return len(active_validators), sum(int(v.effective_balance) for v in active_validators)
+
+
+class ActiveBalanceTotals(RegistryIndex):
+    """
+    Number and combined effective balance of the active validators, by registry and epoch.
+    With ``debug``, every result is checked against a naive sum.
+    """
+
+    def __init__(self, cache_size: int = 16) -> None:
+        super().__init__(cache_size, latest_size=4)
+        self.debug = False
+
+    def get_totals(self, validators: View, epoch: int) -> Tuple[int, int]:
+        totals = self.get_value((validators,), epoch)
+        if self.debug:
+            assert totals == naive_sum_active_balances(validators, epoch)
+        return totals
+
+    def build(self, lists: Sequence[View], epoch: int) -> Tuple[int, int]:
+        return sum_active_balances(lists[0], epoch)
+
+    def update(self, totals: Tuple[int, int], changes: Dict[int, Tuple[Node, Node]],
+               lists: Sequence[View], epoch: int) -> Tuple[int, int]:
+        count, total = totals
+        for previous, current in changes.values():
+            previous_active, previous_effective_balance = get_validator_contribution(previous, epoch)
+            current_active, current_effective_balance = get_validator_contribution(current, epoch)
+            count += current_active - previous_active
+            total += current_effective_balance - previous_effective_balance
+        return count, total
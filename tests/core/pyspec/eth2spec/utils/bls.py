@@ -1,3 +1,6 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
 from py_ecc.bls import G2ProofOfPossession as py_ecc_bls
 from py_ecc.bls.g2_primatives import signature_to_G2 as _signature_to_G2
 from py_ecc.optimized_bls12_381 import (  # noqa: F401
@@ -25,6 +28,7 @@ from py_arkworks_bls12381 import (
     Scalar as arkworks_Scalar,
     GT as arkworks_GT,
 )
+from lru import LRU
 
 
 import milagro_bls_binding as milagro_bls  # noqa: F401 for BLS switching option
@@ -57,6 +61,17 @@ STUB_PUBKEY = b'\x22' * 48
 G2_POINT_AT_INFINITY = b'\xc0' + b'\x00' * 95
 STUB_COORDINATES = _signature_to_G2(G2_POINT_AT_INFINITY)
 
+# Decompressed validator pubkeys, by point type and validator index. See ``get_validator_pubkey_point``.
+VALIDATOR_PUBKEY_CACHE_SIZE = 2**16
+validator_pubkey_points = LRU(size=VALIDATOR_PUBKEY_CACHE_SIZE)
+
+# Signature sets deferred by ``deferred_signature_checks``, ``None`` when signatures are checked right away
+deferred_signature_sets = None
+
+# Process pool checking the signature sets of ``FastAggregateVerifyMultiple``, ``None`` to check them serially
+signature_executor = None
+signature_workers = 1
+
 
 def use_milagro():
     """
@@ -90,6 +105,57 @@ def use_fastest():
     bls = fastest_bls
 
 
+@contextmanager
+def deferred_signature_checks():
+    """
+    Context in which ``Verify`` and ``FastAggregateVerify`` record their signature set and return ``True``.
+    Yields the list of recorded signature sets, to check at once with ``FastAggregateVerifyMultiple``.
+    """
+    global deferred_signature_sets
+    previous_signature_sets = deferred_signature_sets
+    deferred_signature_sets = []
+    try:
+        yield deferred_signature_sets
+    finally:
+        deferred_signature_sets = previous_signature_sets
+
+
+@contextmanager
+def immediate_signature_checks():
+    """
+    Context in which signatures are checked right away, also within ``deferred_signature_checks``
+    """
+    global deferred_signature_sets
+    previous_signature_sets = deferred_signature_sets
+    deferred_signature_sets = None
+    try:
+        yield
+    finally:
+        deferred_signature_sets = previous_signature_sets
+
+
+def use_signature_process_pool(max_workers):
+    """
+    Shortcut to split the signature sets of ``FastAggregateVerifyMultiple`` across ``max_workers`` processes.
+    Processes rather than threads, the Milagro binding holds the GIL while checking signatures.
+    """
+    global signature_executor, signature_workers
+    use_serial_signature_checks()
+    signature_executor = ProcessPoolExecutor(max_workers=max_workers)
+    signature_workers = max_workers
+
+
+def use_serial_signature_checks():
+    """
+    Shortcut to check the signature sets of ``FastAggregateVerifyMultiple`` on the calling thread
+    """
+    global signature_executor, signature_workers
+    if signature_executor is not None:
+        signature_executor.shutdown(wait=True)
+    signature_executor = None
+    signature_workers = 1
+
+
 def only_with_bls(alt_return=None):
     """
     Decorator factory to make a function only run when BLS is active. Otherwise return the default.
@@ -106,6 +172,9 @@ def only_with_bls(alt_return=None):
 
 @only_with_bls(alt_return=True)
 def Verify(PK, message, signature):
+    if deferred_signature_sets is not None:
+        deferred_signature_sets.append(([PK], message, signature))
+        return True
     try:
         if bls == arkworks_bls:  # no signature API in arkworks
             result = py_ecc_bls.Verify(PK, message, signature)
@@ -132,6 +201,9 @@ def AggregateVerify(pubkeys, messages, signature):
 
 @only_with_bls(alt_return=True)
 def FastAggregateVerify(pubkeys, message, signature):
+    if deferred_signature_sets is not None:
+        deferred_signature_sets.append((list(pubkeys), message, signature))
+        return True
     try:
         if bls == arkworks_bls:  # no signature API in arkworks
             result = py_ecc_bls.FastAggregateVerify(list(pubkeys), message, signature)
@@ -143,6 +215,51 @@ def FastAggregateVerify(pubkeys, message, signature):
         return result
 
 
+@only_with_bls(alt_return=True)
+def FastAggregateVerifyMultiple(signature_sets):
+    """
+    Check ``FastAggregateVerify(pubkeys, message, signature)`` for every signature set at once.
+    With Milagro, a single randomized multi-pairing verifies all the sets.
+    With a signature process pool, each worker checks a share of the sets that way,
+    and the first failing share cancels the shares not started yet.
+    A ``False`` result does not tell which set is invalid.
+    """
+    try:
+        if bls == milagro_bls or bls == fastest_bls:
+            signature_sets = [
+                ([bytes(pubkey) for pubkey in pubkeys], bytes(message), bytes(signature))
+                for pubkeys, message, signature in signature_sets
+            ]
+            if signature_executor is None or len(signature_sets) < 2:
+                result = _milagro_verify_multiple(signature_sets)
+            else:
+                result = _milagro_verify_multiple_in_pool(signature_sets)
+        else:
+            result = all(FastAggregateVerify(*signature_set) for signature_set in signature_sets)
+    except Exception:
+        result = False
+    finally:
+        return result
+
+
+def _milagro_verify_multiple(signature_sets):
+    return milagro_bls.VerifyMultipleAggregateSignatures([
+        (signature, milagro_bls._AggregatePKs(pubkeys), message)
+        for pubkeys, message, signature in signature_sets
+    ])
+
+
+def _milagro_verify_multiple_in_pool(signature_sets):
+    shares = [signature_sets[i::signature_workers] for i in range(min(signature_workers, len(signature_sets)))]
+    futures = [signature_executor.submit(_milagro_verify_multiple, share) for share in shares]
+    try:
+        # The result does not depend on the completion order, only on whether a share fails
+        return all(future.result() for future in as_completed(futures))
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 @only_with_bls(alt_return=STUB_SIGNATURE)
 def Aggregate(signatures):
     if bls == arkworks_bls:  # no signature API in arkworks
@@ -324,3 +441,71 @@ def bytes96_to_G2(bytes96):
 @only_with_bls(alt_return=True)
 def KeyValidate(pubkey):
     return py_ecc_bls.KeyValidate(pubkey)
+
+
+@only_with_bls(alt_return=True)
+def KeyValidateMultiple(pubkeys):
+    """
+    Check ``KeyValidate`` for every pubkey in ``pubkeys``, natively with Milagro whatever the backend.
+    """
+    try:
+        milagro_bls._AggregatePKs(list(pubkeys))
+    except Exception:
+        return False
+    return True
+
+
+def set_validator_pubkey_cache_size(size):
+    """
+    Resize the cache of decompressed validator pubkeys, dropping the least recently used ones
+    """
+    validator_pubkey_points.set_size(size)
+
+
+def get_validator_pubkey_point(index, pubkey):
+    """
+    Returns ``pubkey``, the pubkey of validator ``index``, as a point in G1
+    of the active backend (see ``bytes48_to_G1``), or ``None`` if it fails ``KeyValidate``.
+    Points are cached by validator index, and replaced if the pubkey at that index differs.
+    """
+    pubkey = bytes(pubkey)
+    # Arkworks and py_ecc points do not mix, each type has its own entries
+    key = (bls == arkworks_bls or bls == fastest_bls, int(index))
+    entry = validator_pubkey_points.get(key)
+    if entry is None or entry[0] != pubkey:
+        try:
+            # Milagro checks KeyValidate natively
+            milagro_bls._AggregatePKs([pubkey])
+            point = bytes48_to_G1(pubkey)
+        except Exception:
+            point = None
+        entry = (pubkey, point)
+        validator_pubkey_points[key] = entry
+    return entry[1]
+
+
+@only_with_bls()
+def cache_validator_pubkey(index, pubkey):
+    """
+    Decompresses the pubkey of validator ``index`` ahead of its first signature check
+    """
+    get_validator_pubkey_point(index, pubkey)
+
+
+@only_with_bls(alt_return=True)
+def FastAggregateVerifyIndexed(indices, pubkeys, message, signature):
+    """
+    Check ``FastAggregateVerify(pubkeys, message, signature)``, where ``pubkeys`` are the pubkeys
+    of the validators ``indices``. The aggregate pubkey is summed from cached points,
+    leaving a single pubkey to decompress in ``Verify``.
+    """
+    if len(pubkeys) == 0:
+        return False
+    aggregate = Z1()
+    for index, pubkey in zip(indices, pubkeys):
+        point = get_validator_pubkey_point(index, pubkey)
+        if point is None:
+            return False
+        aggregate = add(aggregate, point)
+    # An identity aggregate fails ``KeyValidate`` in ``Verify``
+    return Verify(G1_to_bytes48(aggregate), message, signature)
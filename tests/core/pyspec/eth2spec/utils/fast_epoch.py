@@ -0,0 +1,406 @@
+"""
+Vectorized epoch processing, an opt-in replacement for the per-validator loops of ``process_epoch``.
+
+Validator fields, balances, participation flags and inactivity scores are exported to NumPy arrays,
+read straight from the leaves of the state tree, the reward, penalty and hysteresis math runs on whole arrays,
+and the results are written back to the state in bulk.
+``enable(spec)`` swaps the epoch processing functions of a spec module for the vectorized ones,
+``disable(spec)`` restores the reference functions. Requires NumPy.
+"""
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from remerkleable.core import View
+from remerkleable.readonly_iters import NodeIter
+from remerkleable.tree import Node
+
+from .packed_array import read_packed_array, write_packed_array
+
+UINT64_MAX = 2**64 - 1
+
+# The SSZ layout the validator columns are read from, one chunk per field
+VALIDATOR_FIELDS = (
+    'pubkey', 'withdrawal_credentials', 'effective_balance', 'slashed',
+    'activation_eligibility_epoch', 'activation_epoch', 'exit_epoch', 'withdrawable_epoch',
+)
+
+
+class VectorizationOverflow(Exception):
+    """
+    The uint64 math of the reference could overflow, the vectorized functions defer to the reference then.
+    """
+    pass
+
+
+class ValidatorColumns(object):
+    __slots__ = (
+        'effective_balance', 'slashed', 'activation_eligibility_epoch', 'activation_epoch', 'exit_epoch',
+        'withdrawable_epoch',
+    )
+
+    def __init__(self, fields: np.ndarray) -> None:
+        self.effective_balance = fields[:, 0].copy()
+        self.slashed = fields[:, 1].astype(bool)
+        self.activation_eligibility_epoch = fields[:, 2].copy()
+        self.activation_epoch = fields[:, 3].copy()
+        self.exit_epoch = fields[:, 4].copy()
+        self.withdrawable_epoch = fields[:, 5].copy()
+        for name in self.__slots__:
+            getattr(self, name).flags.writeable = False
+
+    def __len__(self) -> int:
+        return len(self.effective_balance)
+
+    def is_active(self, epoch: int) -> np.ndarray:
+        return (self.activation_epoch <= epoch) & (epoch < self.exit_epoch)
+
+
+# The columns of the latest exported validator registry. Tree nodes are immutable,
+# so the columns remain valid for as long as the registry has the same backing.
+_validator_columns_cache: Optional[Tuple[Node, ValidatorColumns]] = None
+
+
+def get_validator_columns(validators: View) -> ValidatorColumns:
+    global _validator_columns_cache
+    backing = validators.get_backing()
+    if _validator_columns_cache is not None and _validator_columns_cache[0] is backing:
+        return _validator_columns_cache[1]
+
+    assert tuple(validators.element_cls().fields().keys()) == VALIDATOR_FIELDS
+    chunks = []
+    # Fields 2 to 7 of each validator, the leaves of the right half of the left subtree and of the right subtree
+    for node in NodeIter(backing, validators.tree_depth(), validators.length()):
+        left_right = node.get_left().get_right()
+        right = node.get_right()
+        right_left = right.get_left()
+        right_right = right.get_right()
+        chunks += (
+            left_right.get_left().root, left_right.get_right().root,
+            right_left.get_left().root, right_left.get_right().root,
+            right_right.get_left().root, right_right.get_right().root,
+        )
+    fields = np.frombuffer(b''.join(chunks), dtype='<u8').reshape(len(validators), 6, 4)[:, :, 0]
+    columns = ValidatorColumns(fields)
+    _validator_columns_cache = (backing, columns)
+    return columns
+
+
+def check_uint64(value: int) -> None:
+    if value > UINT64_MAX:
+        raise VectorizationOverflow()
+
+
+def get_latest_constant(spec: Any, *names: str) -> int:
+    """
+    Return the first of the constants ``names`` that ``spec`` defines, e.g. the latest fork's version of a constant.
+    """
+    for name in names:
+        if hasattr(spec, name):
+            return int(getattr(spec, name))
+    raise AttributeError(names[-1])
+
+
+def is_post_altair(spec: Any) -> bool:
+    return hasattr(spec, 'get_flag_index_deltas')
+
+
+def get_eligible_mask(spec: Any, state: View, columns: ValidatorColumns) -> np.ndarray:
+    previous_epoch = int(spec.get_previous_epoch(state))
+    return columns.is_active(previous_epoch) | (columns.slashed & (previous_epoch + 1 < columns.withdrawable_epoch))
+
+
+def get_indices_mask(size: int, indices: Sequence[int]) -> np.ndarray:
+    mask = np.zeros(size, dtype=bool)
+    mask[np.fromiter(indices, dtype=np.int64, count=len(indices))] = True
+    return mask
+
+
+def apply_deltas(balances: np.ndarray, rewards: np.ndarray, penalties: np.ndarray) -> np.ndarray:
+    """
+    ``increase_balance`` then ``decrease_balance`` for every validator.
+    """
+    if np.any(rewards > UINT64_MAX - balances):
+        raise VectorizationOverflow()
+    balances = balances + rewards
+    return np.where(penalties > balances, np.uint64(0), balances - penalties)
+
+
+def get_unslashed_participating_mask(spec: Any, state: View, columns: ValidatorColumns, flag_index: int) -> np.ndarray:
+    previous_epoch = int(spec.get_previous_epoch(state))
+    flags = read_packed_array(state.previous_epoch_participation)
+    has_flag = ((flags >> flag_index) & 1).astype(bool)
+    return columns.is_active(previous_epoch) & ~columns.slashed & has_flag
+
+
+def get_flag_index_deltas(spec: Any, state: View, flag_index: int) -> Tuple[np.ndarray, np.ndarray]:
+    columns = get_validator_columns(state.validators)
+    rewards = np.zeros(len(columns), dtype=np.uint64)
+    penalties = np.zeros(len(columns), dtype=np.uint64)
+    increment = int(spec.EFFECTIVE_BALANCE_INCREMENT)
+    weight = int(spec.PARTICIPATION_FLAG_WEIGHTS[flag_index])
+    participating = get_unslashed_participating_mask(spec, state, columns, flag_index)
+    participating_balance = max(increment, int(columns.effective_balance[participating].sum()))
+    participating_increments = participating_balance // increment
+    active_increments = int(spec.get_total_active_balance(state)) // increment
+    base_reward_per_increment = int(spec.get_base_reward_per_increment(state))
+    check_uint64(int(columns.effective_balance.max(initial=0)) // increment * base_reward_per_increment
+                 * weight * participating_increments)
+    base_rewards = columns.effective_balance // increment * base_reward_per_increment
+    eligible = get_eligible_mask(spec, state, columns)
+
+    if not spec.is_in_inactivity_leak(state):
+        rewarded = eligible & participating
+        rewards[rewarded] = (
+            base_rewards[rewarded] * weight * participating_increments
+            // (active_increments * int(spec.WEIGHT_DENOMINATOR))
+        )
+    if flag_index != spec.TIMELY_HEAD_FLAG_INDEX:
+        penalized = eligible & ~participating
+        penalties[penalized] = base_rewards[penalized] * weight // int(spec.WEIGHT_DENOMINATOR)
+    return rewards, penalties
+
+
+def get_inactivity_penalty_deltas(spec: Any, state: View) -> Tuple[np.ndarray, np.ndarray]:
+    columns = get_validator_columns(state.validators)
+    rewards = np.zeros(len(columns), dtype=np.uint64)
+    penalties = np.zeros(len(columns), dtype=np.uint64)
+    target = get_unslashed_participating_mask(spec, state, columns, spec.TIMELY_TARGET_FLAG_INDEX)
+    penalized = get_eligible_mask(spec, state, columns) & ~target
+    inactivity_scores = read_packed_array(state.inactivity_scores)
+    check_uint64(int(columns.effective_balance.max(initial=0)) * int(inactivity_scores.max(initial=0)))
+    quotient = get_latest_constant(spec, 'INACTIVITY_PENALTY_QUOTIENT_BELLATRIX', 'INACTIVITY_PENALTY_QUOTIENT_ALTAIR')
+    penalties[penalized] = (
+        columns.effective_balance[penalized] * inactivity_scores[penalized]
+        // (int(spec.config.INACTIVITY_SCORE_BIAS) * quotient)
+    )
+    return rewards, penalties
+
+
+def get_attestation_deltas(spec: Any, state: View) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Phase0 attestation deltas: source, target, head, inclusion delay and inactivity.
+    """
+    columns = get_validator_columns(state.validators)
+    size = len(columns)
+    rewards = np.zeros(size, dtype=np.uint64)
+    penalties = np.zeros(size, dtype=np.uint64)
+    previous_epoch = spec.get_previous_epoch(state)
+    increment = int(spec.EFFECTIVE_BALANCE_INCREMENT)
+    total_balance = int(spec.get_total_active_balance(state))
+    effective_balance = columns.effective_balance
+    max_effective_balance = int(effective_balance.max(initial=0))
+    check_uint64(max_effective_balance * int(spec.BASE_REWARD_FACTOR))
+    base_rewards = (
+        effective_balance * int(spec.BASE_REWARD_FACTOR)
+        // int(spec.integer_squareroot(total_balance)) // int(spec.BASE_REWARDS_PER_EPOCH)
+    )
+    proposer_rewards = base_rewards // int(spec.PROPOSER_REWARD_QUOTIENT)
+    eligible = get_eligible_mask(spec, state, columns)
+    is_in_inactivity_leak = spec.is_in_inactivity_leak(state)
+
+    source_attestations = spec.get_matching_source_attestations(state, previous_epoch)
+    target_attestations = spec.get_matching_target_attestations(state, previous_epoch)
+    head_attestations = spec.get_matching_head_attestations(state, previous_epoch)
+    attesting_masks = [
+        get_indices_mask(size, spec.get_unslashed_attesting_indices(state, attestations))
+        for attestations in (source_attestations, target_attestations, head_attestations)
+    ]
+
+    # Source, target and head components
+    for attesting in attesting_masks:
+        rewarded = eligible & attesting
+        if is_in_inactivity_leak:
+            rewards[rewarded] += base_rewards[rewarded]
+        else:
+            attesting_balance = max(increment, int(effective_balance[attesting].sum()))
+            check_uint64(int(base_rewards.max(initial=0)) * (attesting_balance // increment))
+            rewards[rewarded] += (
+                base_rewards[rewarded] * (attesting_balance // increment) // (total_balance // increment)
+            )
+        penalized = eligible & ~attesting
+        penalties[penalized] += base_rewards[penalized]
+
+    # Inclusion delay, from the earliest included attestation of each attester
+    inclusion_delays = np.full(size, UINT64_MAX, dtype=np.uint64)
+    proposer_indices = np.zeros(size, dtype=np.int64)
+    for attestation in source_attestations:
+        attesting_indices = spec.get_attesting_indices(state, attestation.data, attestation.aggregation_bits)
+        indices = np.fromiter(attesting_indices, dtype=np.int64, count=len(attesting_indices))
+        indices = indices[attestation.inclusion_delay < inclusion_delays[indices]]
+        inclusion_delays[indices] = attestation.inclusion_delay
+        proposer_indices[indices] = attestation.proposer_index
+    attesters = np.flatnonzero(attesting_masks[0])
+    np.add.at(rewards, proposer_indices[attesters], proposer_rewards[attesters])
+    rewards[attesters] += (base_rewards[attesters] - proposer_rewards[attesters]) // inclusion_delays[attesters]
+
+    # Inactivity
+    if is_in_inactivity_leak:
+        penalties[eligible] += int(spec.BASE_REWARDS_PER_EPOCH) * base_rewards[eligible] - proposer_rewards[eligible]
+        finality_delay = int(spec.get_finality_delay(state))
+        check_uint64(max_effective_balance * finality_delay)
+        missed = eligible & ~attesting_masks[1]
+        penalties[missed] += effective_balance[missed] * finality_delay // int(spec.INACTIVITY_PENALTY_QUOTIENT)
+    return rewards, penalties
+
+
+def process_inactivity_updates(spec: Any, state: View) -> None:
+    if spec.get_current_epoch(state) == spec.GENESIS_EPOCH:
+        return
+    columns = get_validator_columns(state.validators)
+    eligible = get_eligible_mask(spec, state, columns)
+    target = get_unslashed_participating_mask(spec, state, columns, spec.TIMELY_TARGET_FLAG_INDEX)
+    inactivity_scores = read_packed_array(state.inactivity_scores).copy()
+    check_uint64(int(inactivity_scores.max(initial=0)) + int(spec.config.INACTIVITY_SCORE_BIAS))
+
+    hit = eligible & target
+    missed = eligible & ~target
+    inactivity_scores[hit] -= np.minimum(np.uint64(1), inactivity_scores[hit])
+    inactivity_scores[missed] += np.uint64(spec.config.INACTIVITY_SCORE_BIAS)
+    if not spec.is_in_inactivity_leak(state):
+        recovery_rate = np.uint64(spec.config.INACTIVITY_SCORE_RECOVERY_RATE)
+        inactivity_scores[eligible] -= np.minimum(recovery_rate, inactivity_scores[eligible])
+    write_packed_array(state.inactivity_scores, inactivity_scores)
+
+
+def process_rewards_and_penalties(spec: Any, state: View) -> None:
+    if spec.get_current_epoch(state) == spec.GENESIS_EPOCH:
+        return
+    if is_post_altair(spec):
+        deltas = [
+            get_flag_index_deltas(spec, state, flag_index)
+            for flag_index in range(len(spec.PARTICIPATION_FLAG_WEIGHTS))
+        ]
+        deltas.append(get_inactivity_penalty_deltas(spec, state))
+    else:
+        deltas = [get_attestation_deltas(spec, state)]
+    balances = read_packed_array(state.balances)
+    for rewards, penalties in deltas:
+        balances = apply_deltas(balances, rewards, penalties)
+    write_packed_array(state.balances, balances)
+
+
+def process_registry_updates(spec: Any, state: View) -> None:
+    columns = get_validator_columns(state.validators)
+    current_epoch = int(spec.get_current_epoch(state))
+    far_future_epoch = int(spec.FAR_FUTURE_EPOCH)
+
+    # Process activation eligibility and ejections
+    to_queue = (
+        (columns.activation_eligibility_epoch == far_future_epoch)
+        & (columns.effective_balance == int(spec.MAX_EFFECTIVE_BALANCE))
+    )
+    to_eject = columns.is_active(current_epoch) & (columns.effective_balance <= int(spec.config.EJECTION_BALANCE))
+    for index in np.flatnonzero(to_queue | to_eject).tolist():
+        if to_queue[index]:
+            state.validators[index].activation_eligibility_epoch = spec.Epoch(current_epoch + 1)
+        if to_eject[index]:
+            spec.initiate_validator_exit(state, spec.ValidatorIndex(index))
+
+    # Queue validators eligible for activation and not yet dequeued for activation
+    activation_eligibility_epochs = np.where(
+        to_queue, np.uint64(current_epoch + 1), columns.activation_eligibility_epoch)
+    eligible = np.flatnonzero(
+        (activation_eligibility_epochs <= int(state.finalized_checkpoint.epoch))
+        & (columns.activation_epoch == far_future_epoch)
+    )
+    # Order by the sequence of activation_eligibility_epoch setting and then index
+    activation_queue = eligible[np.lexsort((eligible, activation_eligibility_epochs[eligible]))]
+    if hasattr(spec, 'get_validator_activation_churn_limit'):
+        churn_limit = int(spec.get_validator_activation_churn_limit(state))
+    else:
+        churn_limit = int(spec.get_validator_churn_limit(state))
+    for index in activation_queue[:churn_limit].tolist():
+        state.validators[index].activation_epoch = spec.compute_activation_exit_epoch(spec.Epoch(current_epoch))
+
+
+def process_slashings(spec: Any, state: View) -> None:
+    epoch = int(spec.get_current_epoch(state))
+    total_balance = int(spec.get_total_active_balance(state))
+    multiplier = get_latest_constant(
+        spec,
+        'PROPORTIONAL_SLASHING_MULTIPLIER_BELLATRIX',
+        'PROPORTIONAL_SLASHING_MULTIPLIER_ALTAIR',
+        'PROPORTIONAL_SLASHING_MULTIPLIER',
+    )
+    total_slashings = sum(int(slashing) for slashing in state.slashings)
+    check_uint64(total_slashings)
+    check_uint64(total_slashings * multiplier)
+    adjusted_total_slashing_balance = min(total_slashings * multiplier, total_balance)
+
+    columns = get_validator_columns(state.validators)
+    withdrawable_epoch = epoch + int(spec.EPOCHS_PER_SLASHINGS_VECTOR) // 2
+    if withdrawable_epoch > UINT64_MAX:
+        raise VectorizationOverflow()
+    to_penalize = np.flatnonzero(columns.slashed & (columns.withdrawable_epoch == withdrawable_epoch))
+    increment = int(spec.EFFECTIVE_BALANCE_INCREMENT)
+    for index in to_penalize.tolist():
+        penalty_numerator = int(columns.effective_balance[index]) // increment * adjusted_total_slashing_balance
+        check_uint64(penalty_numerator)
+        penalty = penalty_numerator // total_balance * increment
+        spec.decrease_balance(state, spec.ValidatorIndex(index), spec.Gwei(penalty))
+
+
+def process_effective_balance_updates(spec: Any, state: View) -> None:
+    columns = get_validator_columns(state.validators)
+    balances = read_packed_array(state.balances)
+    effective_balances = columns.effective_balance
+    increment = int(spec.EFFECTIVE_BALANCE_INCREMENT)
+    hysteresis_increment = increment // int(spec.HYSTERESIS_QUOTIENT)
+    downward_threshold = hysteresis_increment * int(spec.HYSTERESIS_DOWNWARD_MULTIPLIER)
+    upward_threshold = hysteresis_increment * int(spec.HYSTERESIS_UPWARD_MULTIPLIER)
+    check_uint64(int(balances.max(initial=0)) + downward_threshold)
+    check_uint64(int(effective_balances.max(initial=0)) + upward_threshold)
+
+    # Update effective balances with hysteresis
+    new_effective_balances = np.minimum(balances - balances % increment, np.uint64(spec.MAX_EFFECTIVE_BALANCE))
+    to_update = (
+        ((balances + downward_threshold < effective_balances) | (effective_balances + upward_threshold < balances))
+        & (new_effective_balances != effective_balances)
+    )
+    for index in np.flatnonzero(to_update).tolist():
+        state.validators[index].effective_balance = spec.Gwei(int(new_effective_balances[index]))
+
+
+FAST_FUNCTIONS: Dict[str, Callable[[Any, View], None]] = {
+    'process_inactivity_updates': process_inactivity_updates,
+    'process_rewards_and_penalties': process_rewards_and_penalties,
+    'process_registry_updates': process_registry_updates,
+    'process_slashings': process_slashings,
+    'process_effective_balance_updates': process_effective_balance_updates,
+}
+
+
+def is_enabled(spec: Any) -> bool:
+    return getattr(spec, '_fast_epoch_references', None) is not None
+
+
+def enable(spec: Any) -> None:
+    """
+    Replace the epoch processing functions of ``spec`` with their vectorized versions.
+    """
+    if is_enabled(spec):
+        return
+    references = {name: getattr(spec, name) for name in FAST_FUNCTIONS.keys() if hasattr(spec, name)}
+
+    def wrap(fast_fn: Callable[[Any, View], None], reference_fn: Callable[[View], None]) -> Callable[[View], None]:
+        def process(state: View) -> None:
+            try:
+                fast_fn(spec, state)
+            except VectorizationOverflow:
+                reference_fn(state)
+        return process
+
+    for name, reference_fn in references.items():
+        setattr(spec, name, wrap(FAST_FUNCTIONS[name], reference_fn))
+    setattr(spec, '_fast_epoch_references', references)
+
+
+def disable(spec: Any) -> None:
+    """
+    Restore the reference epoch processing functions of ``spec``.
+    """
+    if not is_enabled(spec):
+        return
+    for name, reference_fn in getattr(spec, '_fast_epoch_references').items():
+        setattr(spec, name, reference_fn)
+    setattr(spec, '_fast_epoch_references', None)
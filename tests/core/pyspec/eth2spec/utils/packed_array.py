@@ -0,0 +1,129 @@
+"""
+Bulk access to SSZ lists and vectors of packed values, as NumPy arrays.
+
+The elements of ``List[uint64, N]``, ``List[ParticipationFlags, N]`` and the like are packed into 32-byte chunks,
+the leaves of the backing tree, and ``Vector[Bytes32, N]`` holds one element per chunk.
+``read_packed_array`` reads the leaves straight from the tree into a single read-only array,
+without a view per element. ``write_packed_array`` compares an array with the current chunks,
+and only replaces the chunks that differ and the nodes on their paths to the root.
+Requires NumPy.
+"""
+from typing import Any, Sequence, Tuple
+
+import numpy as np
+from lru import LRU
+from remerkleable.basic import uint, uint256
+from remerkleable.byte_arrays import ByteVector
+from remerkleable.complex import List
+from remerkleable.core import View, pack_bytes_to_chunks
+from remerkleable.readonly_iters import NodeIter
+from remerkleable.settings import Root
+from remerkleable.tree import Node, PairNode, RootNode, subtree_fill_to_contents, zero_node
+
+CHUNK_SIZE = 32
+
+# Arrays by backing. Tree nodes are immutable, so an array remains valid for as long as the backing is the same.
+_array_cache = LRU(size=16)
+
+
+def get_element_dtype(values: View) -> np.dtype:
+    """
+    Return the dtype of the elements of ``values``, little-endian unsigned integers or rows of bytes.
+    """
+    element_cls = values.element_cls()
+    size = element_cls.type_byte_length()
+    if issubclass(element_cls, uint) and size <= 8:
+        return np.dtype(f'<u{size}')
+    if issubclass(element_cls, ByteVector) and size == CHUNK_SIZE:
+        return np.dtype((np.uint8, CHUNK_SIZE))
+    raise TypeError(f"no packed array for elements of type {element_cls.type_repr()}")
+
+
+def get_chunk_count(values: View, length: int) -> int:
+    size = values.element_cls().type_byte_length()
+    return (length * size + CHUNK_SIZE - 1) // CHUNK_SIZE
+
+
+def get_contents(values: View) -> Tuple[Node, int]:
+    """
+    Return the subtree of the chunks of ``values``, and its depth.
+    """
+    # The left subtree of a list holds the elements, the right node their number
+    if isinstance(values, List):
+        return values.get_backing().get_left(), values.contents_depth()
+    return values.get_backing(), values.tree_depth()
+
+
+def read_packed_array(values: View) -> np.ndarray:
+    """
+    Return the elements of ``values`` as a read-only array.
+    """
+    backing = values.get_backing()
+    array = _array_cache.get(backing)
+    if array is None:
+        length = len(values)
+        contents, depth = get_contents(values)
+        chunks = NodeIter(contents, depth, get_chunk_count(values, length))
+        array = np.frombuffer(b''.join(chunk.root for chunk in chunks), dtype=get_element_dtype(values))[:length]
+        _array_cache[backing] = array
+    return array
+
+
+def set_chunks(node: Node, depth: int, offset: int, indices: Sequence[int], chunks: np.ndarray) -> Node:
+    """
+    Return ``node``, a subtree of ``depth`` starting at chunk ``offset``,
+    with the chunks at ``indices``, sorted and within the subtree, replaced by those of ``chunks``.
+    """
+    if depth == 0:
+        return RootNode(Root(chunks[indices[0]].tobytes()))
+    # Zero subtrees are collapsed into a single node
+    left, right = (zero_node(depth - 1),) * 2 if node.is_leaf() else (node.get_left(), node.get_right())
+    middle = offset + 2**(depth - 1)
+    split = int(np.searchsorted(indices, middle))
+    if split > 0:
+        left = set_chunks(left, depth - 1, offset, indices[:split], chunks)
+    if split < len(indices):
+        right = set_chunks(right, depth - 1, middle, indices[split:], chunks)
+    return PairNode(left, right)
+
+
+def pack_array(values: View, data: bytes, length: int) -> Node:
+    _, depth = get_contents(values)
+    contents = subtree_fill_to_contents(pack_bytes_to_chunks(data), depth)
+    if isinstance(values, List):
+        return PairNode(contents, uint256(length).get_backing())
+    return contents
+
+
+def write_packed_array(values: View, array: Any) -> None:
+    """
+    Set the elements of ``values`` to those of ``array``. Only the chunks that differ are replaced,
+    unless the length differs or more than a quarter of the chunks differ, then the elements are packed anew.
+    """
+    dtype = get_element_dtype(values)
+    # Rows of bytes are converted as bytes
+    data = np.ascontiguousarray(array, dtype=dtype.base).tobytes()
+    length = len(data) // dtype.itemsize
+    if length != len(values):
+        assert isinstance(values, List)
+        values.set_backing(pack_array(values, data, length))
+        return
+
+    chunk_count = get_chunk_count(values, length)
+    padding = b'\x00' * (chunk_count * CHUNK_SIZE - len(data))
+    chunks = np.frombuffer(data + padding, dtype=np.uint8).reshape(chunk_count, CHUNK_SIZE)
+    previous = read_packed_array(values).tobytes()
+    previous_chunks = np.frombuffer(previous + padding, dtype=np.uint8).reshape(chunk_count, CHUNK_SIZE)
+    indices = np.flatnonzero((chunks != previous_chunks).any(axis=1))
+    if len(indices) == 0:
+        return
+    # Past that, rebuilding the paths to the chunks costs more than packing every chunk
+    if len(indices) > chunk_count // 4:
+        values.set_backing(pack_array(values, data, length))
+        return
+    contents, depth = get_contents(values)
+    contents = set_chunks(contents, depth, 0, indices, chunks)
+    if isinstance(values, List):
+        values.set_backing(PairNode(contents, values.get_backing().get_right()))
+    else:
+        values.set_backing(contents)
@@ -0,0 +1,300 @@
+"""
+Proto-array LMD-GHOST, an optimized alternative to the reference fork choice ``get_head``/``get_weight``.
+
+Blocks are stored in a flat array in insertion order, so a parent always comes before its children.
+Each node keeps the total vote weight of its subtree. Votes and balances are applied as deltas,
+propagated from the leaves towards the root in a single backward pass over the array.
+Each node also keeps skip pointers to its ``2**k``-th ancestors, for ``O(log(depth))`` ancestor lookups.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+
+class ProtoNode(object):
+    __slots__ = ('root', 'parent', 'slot', 'weight', 'jumps')
+
+    def __init__(self, root: bytes, parent: Optional[int], slot: int) -> None:
+        self.root = root
+        self.parent = parent
+        self.slot = slot
+        self.weight = 0
+        # ``jumps[k]`` is the index of the ``2**k``-th ancestor, ``jumps[0]`` being the parent
+        self.jumps: List[int] = []
+
+
+class ProtoArray(object):
+    def __init__(self) -> None:
+        self.nodes: List[ProtoNode] = []
+        self.indices: Dict[bytes, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, root: bytes) -> bool:
+        return root in self.indices
+
+    def on_block(self, root: bytes, parent_root: bytes, slot: int) -> None:
+        """
+        Register a block. The parent must already be known, unless the block is the anchor of the tree.
+        """
+        if root in self.indices:
+            return
+        parent = self.indices.get(parent_root)
+        assert parent is not None or len(self.nodes) == 0
+        node = ProtoNode(root, parent, slot)
+        if parent is not None:
+            node.jumps.append(parent)
+            while len(self.nodes[node.jumps[-1]].jumps) >= len(node.jumps):
+                node.jumps.append(self.nodes[node.jumps[-1]].jumps[len(node.jumps) - 1])
+        self.indices[root] = len(self.nodes)
+        self.nodes.append(node)
+
+    def get_ancestor(self, root: bytes, slot: int) -> Optional[bytes]:
+        """
+        Return the root of the latest block at or before ``slot`` in the chain of ``root``,
+        or ``None`` if that block is older than the anchor of the tree.
+        """
+        node = self.nodes[self.indices[root]]
+        if node.slot <= slot:
+            return node.root
+        # Jump to the oldest ancestor that is still after ``slot``, its parent is the ancestor at ``slot``
+        for k in reversed(range(len(node.jumps))):
+            if k < len(node.jumps) and self.nodes[node.jumps[k]].slot > slot:
+                node = self.nodes[node.jumps[k]]
+        if node.parent is None:
+            return None
+        return self.nodes[node.parent].root
+
+    def get_weight(self, root: bytes) -> int:
+        return self.nodes[self.indices[root]].weight
+
+    def apply_score_changes(self, deltas: Dict[bytes, int]) -> None:
+        """
+        Apply per-block weight ``deltas``. A delta on a block also applies to all of its ancestors.
+        """
+        node_deltas = [0] * len(self.nodes)
+        for root, delta in deltas.items():
+            # Votes for pruned blocks do not count towards any remaining block
+            if root in self.indices:
+                node_deltas[self.indices[root]] += delta
+        for index in reversed(range(len(self.nodes))):
+            delta = node_deltas[index]
+            if delta == 0:
+                continue
+            node = self.nodes[index]
+            node.weight += delta
+            if node.parent is not None:
+                node_deltas[node.parent] += delta
+
+    def prune(self, finalized_root: bytes) -> List[bytes]:
+        """
+        Drop all blocks that are not descendants of ``finalized_root``, which becomes the anchor of the tree.
+        Return the roots of the dropped blocks.
+        """
+        finalized_index = self.indices[finalized_root]
+        if finalized_index == 0:
+            return []
+        new_indices: Dict[int, int] = {finalized_index: 0}
+        nodes = [self.nodes[finalized_index]]
+        pruned = [node.root for node in self.nodes[:finalized_index]]
+        for index in range(finalized_index + 1, len(self.nodes)):
+            node = self.nodes[index]
+            if node.parent in new_indices:
+                new_indices[index] = len(nodes)
+                nodes.append(node)
+            else:
+                pruned.append(node.root)
+
+        # Ancestors up to the new anchor remain, they are a prefix of the skip pointers
+        for node in nodes:
+            node.jumps = [new_indices[jump] for jump in node.jumps if jump in new_indices]
+            node.parent = node.jumps[0] if len(node.jumps) > 0 else None
+        self.nodes = nodes
+        self.indices = {node.root: index for index, node in enumerate(nodes)}
+        return pruned
+
+    def filter_block_tree(self, justified_root: bytes,
+                          is_viable_leaf: Callable[[bytes], bool]) -> Tuple[List[bool], List[Optional[int]]]:
+        """
+        Resolve the viability and the best viable child of every block in the subtree of ``justified_root``.
+        A leaf is viable if accepted by ``is_viable_leaf``, other blocks are viable if any of their children is.
+        Both lists are indexed by offset from the index of ``justified_root``.
+        """
+        justified_index = self.indices[justified_root]
+        nodes = self.nodes[justified_index:]
+
+        # Descendants always come after their ancestors, a forward pass marks the justified subtree
+        in_subtree = [False] * len(nodes)
+        in_subtree[0] = True
+        for offset in range(1, len(nodes)):
+            parent = nodes[offset].parent
+            in_subtree[offset] = (
+                parent is not None and parent >= justified_index and in_subtree[parent - justified_index]
+            )
+
+        # A backward pass resolves viability and the best child of every node in the subtree
+        has_children = [False] * len(nodes)
+        viable = [False] * len(nodes)
+        best_child: List[Optional[int]] = [None] * len(nodes)
+        for offset in reversed(range(len(nodes))):
+            if not in_subtree[offset]:
+                continue
+            node = nodes[offset]
+            if not has_children[offset]:
+                viable[offset] = is_viable_leaf(node.root)
+            if node.parent is None or offset == 0:
+                break
+            parent_offset = node.parent - justified_index
+            has_children[parent_offset] = True
+            if not viable[offset]:
+                continue
+            viable[parent_offset] = True
+            best = best_child[parent_offset]
+            if best is None or (node.weight, node.root) > (nodes[best].weight, nodes[best].root):
+                best_child[parent_offset] = offset
+        return viable, best_child
+
+    def get_filtered_block_tree(self, justified_root: bytes, is_viable_leaf: Callable[[bytes], bool]) -> List[bytes]:
+        justified_index = self.indices[justified_root]
+        viable, _ = self.filter_block_tree(justified_root, is_viable_leaf)
+        return [self.nodes[justified_index + offset].root for offset, is_viable in enumerate(viable) if is_viable]
+
+    def find_head(self, justified_root: bytes, is_viable_leaf: Callable[[bytes], bool]) -> bytes:
+        """
+        Run LMD-GHOST from ``justified_root``, only descending into viable branches.
+        Ties are broken by favoring the higher root.
+        """
+        justified_index = self.indices[justified_root]
+        _, best_child = self.filter_block_tree(justified_root, is_viable_leaf)
+        head = 0
+        child = best_child[head]
+        while child is not None:
+            head, child = child, best_child[child]
+        return self.nodes[justified_index + head].root
+
+
+class VoteTracker(object):
+    """
+    The latest vote and the balance of every validator, as reflected in the proto-array weights.
+    Changes to votes, balances and equivocations accumulate in a per-block weight delta map,
+    so applying them costs ``O(changes)`` instead of ``O(validators)``.
+    """
+
+    def __init__(self) -> None:
+        self.votes: Dict[int, bytes] = {}
+        self.balances: Sequence[int] = []
+        self.equivocating_indices: Set[int] = set()
+        self.deltas: Dict[bytes, int] = {}
+
+    def get_balance(self, validator_index: int) -> int:
+        return int(self.balances[validator_index]) if validator_index < len(self.balances) else 0
+
+    def add_delta(self, root: bytes, delta: int) -> None:
+        if delta != 0:
+            self.deltas[root] = self.deltas.get(root, 0) + delta
+
+    def process_vote(self, validator_index: int, root: bytes) -> None:
+        if validator_index in self.equivocating_indices:
+            return
+        old_root = self.votes.get(validator_index)
+        if old_root == root:
+            return
+        balance = self.get_balance(validator_index)
+        if old_root is not None:
+            self.add_delta(old_root, -balance)
+        self.add_delta(root, balance)
+        self.votes[validator_index] = root
+
+    def process_equivocation(self, validator_index: int) -> None:
+        self.equivocating_indices.add(validator_index)
+        old_root = self.votes.pop(validator_index, None)
+        if old_root is not None:
+            self.add_delta(old_root, -self.get_balance(validator_index))
+
+    def update_balances(self, balances: Sequence[int]) -> None:
+        for validator_index, root in self.votes.items():
+            new_balance = int(balances[validator_index]) if validator_index < len(balances) else 0
+            self.add_delta(root, new_balance - self.get_balance(validator_index))
+        self.balances = balances
+
+    def pop_deltas(self) -> Dict[bytes, int]:
+        deltas = self.deltas
+        self.deltas = {}
+        return deltas
+
+
+class ProtoArrayForkChoice(object):
+    """
+    Proto-array with a vote tracker, and the justified checkpoint and proposer boost its weights were computed with.
+    """
+
+    def __init__(self) -> None:
+        self.proto_array = ProtoArray()
+        self.vote_tracker = VoteTracker()
+        self.justified_checkpoint: Optional[Any] = None
+        self.boost_root: Optional[bytes] = None
+        self.boost_score = 0
+        # The cached result of ``is_viable_leaf`` for every leaf, valid as long as the viability context is
+        self.leaf_viability: Dict[bytes, bool] = {}
+        self.viability_context: Optional[Any] = None
+
+    def on_block(self, root: bytes, parent_root: bytes, slot: int) -> None:
+        self.proto_array.on_block(root, parent_root, slot)
+        # The parent is not a leaf anymore
+        self.leaf_viability.pop(parent_root, None)
+
+    def prune(self, finalized_root: bytes) -> None:
+        for root in self.proto_array.prune(finalized_root):
+            self.leaf_viability.pop(root, None)
+
+    def update_viability_context(self, viability_context: Any) -> None:
+        """
+        Drop the cached leaf viability if ``viability_context`` (e.g. the store checkpoints) changed.
+        """
+        if viability_context != self.viability_context:
+            self.viability_context = viability_context
+            self.leaf_viability = {}
+
+    def is_viable_leaf(self, root: bytes, is_viable_leaf: Callable[[bytes], bool]) -> bool:
+        if root not in self.leaf_viability:
+            self.leaf_viability[root] = is_viable_leaf(root)
+        return self.leaf_viability[root]
+
+    def process_vote(self, validator_index: int, root: bytes) -> None:
+        self.vote_tracker.process_vote(validator_index, root)
+
+    def process_equivocation(self, validator_index: int) -> None:
+        self.vote_tracker.process_equivocation(validator_index)
+
+    def update_balances(self, justified_checkpoint: Any, balances: Sequence[int]) -> None:
+        self.justified_checkpoint = justified_checkpoint
+        self.vote_tracker.update_balances(balances)
+
+    def apply_score_changes(self, boost_root: Optional[bytes], boost_score: int) -> None:
+        """
+        Apply the pending vote deltas, and replace the previously applied proposer boost
+        with a boost of ``boost_score`` on ``boost_root``.
+        """
+        deltas = self.vote_tracker.pop_deltas()
+        boost_score = int(boost_score)
+        if (boost_root, boost_score) != (self.boost_root, self.boost_score):
+            if self.boost_root is not None:
+                deltas[self.boost_root] = deltas.get(self.boost_root, 0) - self.boost_score
+            if boost_root is not None:
+                deltas[boost_root] = deltas.get(boost_root, 0) + boost_score
+            self.boost_root = boost_root
+            self.boost_score = boost_score
+        if len(deltas) > 0:
+            self.proto_array.apply_score_changes(deltas)
+
+    def get_weight(self, root: bytes) -> int:
+        return self.proto_array.get_weight(root)
+
+    def get_ancestor(self, root: bytes, slot: int) -> Optional[bytes]:
+        return self.proto_array.get_ancestor(root, slot)
+
+    def get_filtered_block_tree(self, justified_root: bytes, is_viable_leaf: Callable[[bytes], bool]) -> List[bytes]:
+        return self.proto_array.get_filtered_block_tree(
+            justified_root, lambda root: self.is_viable_leaf(root, is_viable_leaf))
+
+    def find_head(self, justified_root: bytes, is_viable_leaf: Callable[[bytes], bool]) -> bytes:
+        return self.proto_array.find_head(justified_root, lambda root: self.is_viable_leaf(root, is_viable_leaf))
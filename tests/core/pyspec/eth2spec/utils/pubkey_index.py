@@ -0,0 +1,70 @@
+from bisect import insort
+from typing import Dict, Iterator, List, Optional
+
+from lru import LRU
+from remerkleable.core import View
+from remerkleable.readonly_iters import NodeIter
+from remerkleable.tree import Node
+
+
+def iter_registry_pubkeys(validators: View) -> Iterator[bytes]:
+    """
+    Iterate over the pubkeys of a validator registry, read straight from the pubkey chunks of each validator.
+    """
+    assert next(iter(validators.element_cls().fields().keys())) == 'pubkey'
+    for node in NodeIter(validators.get_backing(), validators.tree_depth(), validators.length()):
+        # The pubkey is the first field, two chunks of a Bytes48
+        pubkey_node = node.get_left().get_left().get_left()
+        yield pubkey_node.get_left().root + pubkey_node.get_right().root[:16]
+
+
+class PubkeyIndexMap(object):
+    """
+    Validator indices by pubkey, shared by every state of a chain.
+
+    Registries only append validators, and a validator keeps its pubkey, so an index found in one state
+    holds for the copies and descendants of that state. Lookups are confirmed against the queried registry,
+    which keeps states with other validators at the same indices apart.
+    """
+
+    def __init__(self, registry_cache_size: int = 16) -> None:
+        # Candidate indices of each pubkey, over all the registries indexed so far
+        self.indices: Dict[bytes, List[int]] = {}
+        # Backings of the registries with all their pubkeys in ``indices``
+        self.indexed_registries = LRU(size=registry_cache_size)
+
+    def add(self, pubkey: bytes, index: int) -> None:
+        candidates = self.indices.setdefault(bytes(pubkey), [])
+        if index not in candidates:
+            insort(candidates, index)
+
+    def index_registry(self, validators: View) -> None:
+        for index, pubkey in enumerate(iter_registry_pubkeys(validators)):
+            self.add(pubkey, index)
+        self.indexed_registries[validators.get_backing()] = True
+
+    def find(self, validators: View, pubkey: bytes) -> Optional[int]:
+        for index in self.indices.get(bytes(pubkey), ()):
+            if index < len(validators) and validators[index].pubkey == pubkey:
+                return index
+        return None
+
+    def get_index(self, validators: View, pubkey: bytes) -> Optional[int]:
+        """
+        Return the index of ``pubkey`` in ``validators``, or ``None``.
+        Unknown pubkeys index the registry once, later misses on the same registry are answered from the map.
+        """
+        index = self.find(validators, pubkey)
+        if index is None and validators.get_backing() not in self.indexed_registries:
+            self.index_registry(validators)
+            index = self.find(validators, pubkey)
+        return index
+
+    def on_append(self, previous_backing: Node, validators: View) -> None:
+        """
+        Record the validator appended to the registry with backing ``previous_backing``, giving ``validators``.
+        """
+        index = len(validators) - 1
+        self.add(validators[index].pubkey, index)
+        if previous_backing in self.indexed_registries:
+            self.indexed_registries[validators.get_backing()] = True
@@ -0,0 +1,127 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Sequence, Set, Tuple
+
+from remerkleable.core import View
+from remerkleable.readonly_iters import NodeIter
+from remerkleable.tree import Node
+
+from .active_balance import (
+    ACTIVATION_EPOCH_GINDEX,
+    EFFECTIVE_BALANCE_GINDEX,
+    EXIT_EPOCH_GINDEX,
+    RegistryIndex,
+    is_validator,
+    read_uint64,
+)
+
+# Chunk of the activation eligibility epoch, in the depth 3 tree of a validator
+ACTIVATION_ELIGIBILITY_EPOCH_GINDEX = 2**3 + 4
+
+
+class RegistryQueues(object):
+    """
+    The validators of a registry that registry updates and exits depend on.
+    """
+
+    def __init__(self,
+                 exit_churn: Dict[int, int],
+                 exit_epochs: List[int],
+                 activation_queue: List[Tuple[int, int]],
+                 eligibility_candidates: Set[int],
+                 ejection_candidates: Set[int]) -> None:
+        # Number of validators by exit epoch
+        self.exit_churn = exit_churn
+        # The epochs of ``exit_churn``, in order
+        self.exit_epochs = exit_epochs
+        # (activation eligibility epoch, index) of the validators eligible but not yet activated, in queue order
+        self.activation_queue = activation_queue
+        # Validators that ``process_registry_updates`` may place in the activation queue
+        self.eligibility_candidates = eligibility_candidates
+        # Validators without an exit epoch that ``process_registry_updates`` may eject
+        self.ejection_candidates = ejection_candidates
+
+    def copy(self) -> "RegistryQueues":
+        return RegistryQueues(
+            dict(self.exit_churn), list(self.exit_epochs), list(self.activation_queue),
+            set(self.eligibility_candidates), set(self.ejection_candidates))
+
+    def get_latest_exit_epoch(self) -> int:
+        return self.exit_epochs[-1] if self.exit_epochs else 0
+
+    def get_registry_update_candidates(self) -> Sequence[int]:
+        """
+        Return the indices of the validators ``process_registry_updates`` may change, in index order.
+        """
+        return sorted(self.eligibility_candidates | self.ejection_candidates)
+
+    def get_activation_queue(self, finalized_epoch: int) -> Sequence[int]:
+        """
+        Return the indices of the validators eligible for activation, in activation order.
+        """
+        end = bisect_right(self.activation_queue, (finalized_epoch, 2**64))
+        return [index for _, index in self.activation_queue[:end]]
+
+
+class RegistryQueueIndex(RegistryIndex):
+    """
+    Registry queues by registry and ejection balance. An exit or a registry update costs a tree diff
+    and a few sorted list updates, instead of a scan of the registry.
+    """
+
+    def __init__(self, far_future_epoch: int, max_effective_balance: int, cache_size: int = 16) -> None:
+        super().__init__(cache_size, latest_size=2)
+        self.far_future_epoch = far_future_epoch
+        self.max_effective_balance = max_effective_balance
+
+    def get_queues(self, validators: View, ejection_balance: int) -> RegistryQueues:
+        return self.get_value((validators,), ejection_balance)
+
+    def build(self, lists: Sequence[View], ejection_balance: int) -> RegistryQueues:
+        validators = lists[0]
+        queues = RegistryQueues({}, [], [], set(), set())
+        for index, node in enumerate(NodeIter(validators.get_backing(), validators.tree_depth(), validators.length())):
+            self.add(queues, index, node, ejection_balance)
+        return queues
+
+    def update(self, queues: RegistryQueues, changes: Dict[int, Tuple[Node, Node]],
+               lists: Sequence[View], ejection_balance: int) -> RegistryQueues:
+        queues = queues.copy()
+        for index, (previous, current) in changes.items():
+            self.remove(queues, index, previous, ejection_balance)
+            self.add(queues, index, current, ejection_balance)
+        return queues
+
+    def add(self, queues: RegistryQueues, index: int, node: Node, ejection_balance: int) -> None:
+        if not is_validator(node):
+            return
+        effective_balance = read_uint64(node, EFFECTIVE_BALANCE_GINDEX)
+        activation_eligibility_epoch = read_uint64(node, ACTIVATION_ELIGIBILITY_EPOCH_GINDEX)
+        exit_epoch = read_uint64(node, EXIT_EPOCH_GINDEX)
+        if exit_epoch != self.far_future_epoch:
+            if exit_epoch not in queues.exit_churn:
+                queues.exit_churn[exit_epoch] = 0
+                insort(queues.exit_epochs, exit_epoch)
+            queues.exit_churn[exit_epoch] += 1
+        elif effective_balance <= ejection_balance:
+            queues.ejection_candidates.add(index)
+        if activation_eligibility_epoch == self.far_future_epoch:
+            if effective_balance == self.max_effective_balance:
+                queues.eligibility_candidates.add(index)
+        elif read_uint64(node, ACTIVATION_EPOCH_GINDEX) == self.far_future_epoch:
+            insort(queues.activation_queue, (activation_eligibility_epoch, index))
+
+    def remove(self, queues: RegistryQueues, index: int, node: Node, ejection_balance: int) -> None:
+        if not is_validator(node):
+            return
+        activation_eligibility_epoch = read_uint64(node, ACTIVATION_ELIGIBILITY_EPOCH_GINDEX)
+        exit_epoch = read_uint64(node, EXIT_EPOCH_GINDEX)
+        if exit_epoch != self.far_future_epoch:
+            queues.exit_churn[exit_epoch] -= 1
+            if queues.exit_churn[exit_epoch] == 0:
+                del queues.exit_churn[exit_epoch]
+                del queues.exit_epochs[bisect_left(queues.exit_epochs, exit_epoch)]
+        queues.ejection_candidates.discard(index)
+        queues.eligibility_candidates.discard(index)
+        if (activation_eligibility_epoch != self.far_future_epoch
+                and read_uint64(node, ACTIVATION_EPOCH_GINDEX) == self.far_future_epoch):
+            del queues.activation_queue[bisect_left(queues.activation_queue, (activation_eligibility_epoch, index))]
@@ -0,0 +1,162 @@
+"""
+Copy-on-write snapshots of SSZ views, with statistics on the tree nodes they share.
+
+``copy`` of a view only copies the reference to its backing tree, and every later change replaces the nodes on the
+path to the changed chunk. The nodes of a snapshot are then either still held by the view it was taken from,
+or unique to one of the two. Sizes are CPython object sizes, the nodes and the roots they hold.
+"""
+import sys
+from typing import Dict, Generic, Iterable, Iterator, Optional, Set, TypeVar
+
+from remerkleable.core import View
+from remerkleable.tree import Node
+
+from .ssz.ssz_impl import copy
+
+V = TypeVar('V', bound=View)
+
+
+def get_node_size(node: Node) -> int:
+    # The root of a pair node is only held once computed
+    root = node.root if node.is_leaf() else getattr(node, '_root', None)
+    return sys.getsizeof(node) + (sys.getsizeof(root) if root is not None else 0)
+
+
+def iter_nodes(backing: Node, seen: Optional[Set[int]] = None) -> Iterator[Node]:
+    """
+    Iterate over the distinct nodes of the tree ``backing``, skipping those in ``seen``, a set of node ids
+    that is extended with the nodes iterated over.
+    """
+    if seen is None:
+        seen = set()
+    stack = [backing]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        yield node
+        if not node.is_leaf():
+            stack.append(node.get_right())
+            stack.append(node.get_left())
+
+
+def add_nodes(backing: Node, seen: Set[int]) -> None:
+    for _ in iter_nodes(backing, seen):
+        pass
+
+
+class SharingStats(object):
+    """
+    Number and size of the nodes of a tree that are unique to it, and of those shared with other trees.
+    """
+
+    def __init__(self, unique_nodes: int = 0, shared_nodes: int = 0,
+                 unique_bytes: int = 0, shared_bytes: int = 0) -> None:
+        self.unique_nodes = unique_nodes
+        self.shared_nodes = shared_nodes
+        self.unique_bytes = unique_bytes
+        self.shared_bytes = shared_bytes
+
+    def __add__(self, other: "SharingStats") -> "SharingStats":
+        return SharingStats(
+            self.unique_nodes + other.unique_nodes, self.shared_nodes + other.shared_nodes,
+            self.unique_bytes + other.unique_bytes, self.shared_bytes + other.shared_bytes)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SharingStats) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return (f"SharingStats(unique_nodes={self.unique_nodes}, shared_nodes={self.shared_nodes}, "
+                f"unique_bytes={self.unique_bytes}, shared_bytes={self.shared_bytes})")
+
+    @property
+    def total_nodes(self) -> int:
+        return self.unique_nodes + self.shared_nodes
+
+    @property
+    def total_bytes(self) -> int:
+        return self.unique_bytes + self.shared_bytes
+
+    @property
+    def shared_fraction(self) -> float:
+        """
+        Fraction of the bytes of the tree that are shared, ``0.0`` for a deep copy.
+        """
+        return self.shared_bytes / self.total_bytes if self.total_bytes else 0.0
+
+
+def count_nodes(backing: Node, shared: Set[int]) -> SharingStats:
+    """
+    Return the statistics of the tree ``backing``, its nodes being shared if their id is in ``shared``.
+    """
+    stats = SharingStats()
+    for node in iter_nodes(backing):
+        size = get_node_size(node)
+        if id(node) in shared:
+            stats.shared_nodes += 1
+            stats.shared_bytes += size
+        else:
+            stats.unique_nodes += 1
+            stats.unique_bytes += size
+    return stats
+
+
+def get_sharing_stats(view: View, *others: View) -> SharingStats:
+    """
+    Return the statistics of the nodes of ``view``, shared if any of ``others`` holds them too.
+    """
+    shared: Set[int] = set()
+    for other in others:
+        add_nodes(other.get_backing(), shared)
+    return count_nodes(view.get_backing(), shared)
+
+
+class Snapshot(Generic[V]):
+    """
+    A copy of a view, that keeps the view it was taken from to report what the two still share.
+    Either of them may be changed after the snapshot is taken.
+    """
+
+    def __init__(self, origin: V) -> None:
+        self.origin = origin
+        self.view = copy(origin)
+
+    def get_stats(self) -> SharingStats:
+        return get_sharing_stats(self.view, self.origin)
+
+
+def snapshot(obj: V) -> Snapshot[V]:
+    return Snapshot(obj)
+
+
+def get_memory_report(collections: Dict[str, Iterable[View]]) -> Dict[str, SharingStats]:
+    """
+    Return the statistics of the views of each collection, and of all of them under ``'total'``.
+
+    Collections and views are counted in order: a node is unique to the first view that holds it,
+    and shared in every later view. ``total_bytes`` is then what the views would take as deep copies,
+    and ``unique_bytes`` what they take with structural sharing.
+    """
+    seen: Set[int] = set()
+    report = {}
+    for name, views in collections.items():
+        stats = SharingStats()
+        for view in views:
+            backing = view.get_backing()
+            stats += count_nodes(backing, seen)
+            add_nodes(backing, seen)
+        report[name] = stats
+    report['total'] = sum(report.values(), SharingStats())
+    return report
+
+
+def get_store_memory_report(store: object) -> Dict[str, SharingStats]:
+    """
+    Return the memory report of the blocks and states held by a fork choice ``store``, by store field.
+    """
+    collections = {}
+    for name, value in vars(store).items():
+        if isinstance(value, dict) and any(isinstance(item, View) for item in value.values()):
+            collections[name] = [item for item in value.values() if isinstance(item, View)]
+    return get_memory_report(collections)
@@ -1,16 +1,38 @@
+from functools import partial
 from typing import TypeVar
 
 from remerkleable.basic import uint
 from remerkleable.core import View
 from remerkleable.byte_arrays import Bytes32
 
+from .ssz_merkleization import PairHasher, batched_merkle_root, hash_pairs, merkle_root
+
+# Merkleization engine of ``hash_tree_root``, remerkleable's recursive hashing by default
+merkleize = merkle_root
+
 
 def serialize(obj: View) -> bytes:
     return obj.encode_bytes()
 
 
 def hash_tree_root(obj: View) -> Bytes32:
-    return Bytes32(obj.get_backing().merkle_root())
+    return Bytes32(merkleize(obj.get_backing()))
+
+
+def use_remerkleable_merkleization() -> None:
+    """
+    Shortcut to hash the dirty nodes of a tree recursively, one at a time
+    """
+    global merkleize
+    merkleize = merkle_root
+
+
+def use_batched_merkleization(hasher: PairHasher = hash_pairs) -> None:
+    """
+    Shortcut to hash the dirty nodes of a tree level by level, one ``hasher`` call per level
+    """
+    global merkleize
+    merkleize = partial(batched_merkle_root, hasher=hasher)
 
 
 def uint_to_bytes(n: uint) -> bytes:
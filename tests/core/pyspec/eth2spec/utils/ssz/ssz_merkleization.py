@@ -0,0 +1,49 @@
+"""
+Merkleization engines behind ``hash_tree_root``.
+
+remerkleable computes the root of a changed tree recursively, one ``merkle_hash`` call per dirty node.
+The batched engine instead collects the dirty nodes of the tree level by level, and hashes each level
+with a single call to a batch routine over the contiguous concatenation of the child roots.
+That routine is the place for a multi-buffer SHA-256 implementation.
+"""
+from hashlib import sha256
+from typing import Callable, List
+
+from remerkleable.settings import Root
+from remerkleable.tree import Node
+
+# Hashes consecutive 64-byte blocks, two child roots each, into as many 32-byte roots
+PairHasher = Callable[[bytes], List[bytes]]
+
+
+def hash_pairs(data: bytes) -> List[bytes]:
+    view = memoryview(data)
+    return [sha256(view[i:i + 64]).digest() for i in range(0, len(data), 64)]
+
+
+def merkle_root(backing: Node) -> Root:
+    return backing.merkle_root()
+
+
+def batched_merkle_root(backing: Node, hasher: PairHasher = hash_pairs) -> Root:
+    """
+    Return the root of the tree ``backing``, hashing its dirty nodes in one ``hasher`` call per tree level.
+    """
+    # Leaves, and pair nodes whose root is computed, hold their root
+    if backing._root is not None:
+        return backing._root
+    levels = []
+    level = [backing]
+    while level:
+        levels.append(level)
+        # Subtrees held at several positions are listed once per level
+        level = list({
+            id(child): child for node in level for child in (node.left, node.right) if child._root is None
+        }.values())
+    # A node held at several depths is listed at each of them, hashing from the deepest level first
+    # gets its children hashed before it in any case.
+    for level in reversed(levels):
+        roots = hasher(b''.join([node.left._root + node.right._root for node in level]))
+        for node, root in zip(level, roots):
+            node._root = Root(root)
+    return backing._root
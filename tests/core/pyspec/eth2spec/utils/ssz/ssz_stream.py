@@ -0,0 +1,216 @@
+"""
+Streaming SSZ decoding, from file objects, memory maps and snappy-compressed files.
+
+``decode_bytes`` copies its input into a new buffer, and builds a view for every container field and every list
+element, basic values included, before building the tree from their backings. ``deserialize_stream`` reads
+the encoding in order from a binary stream, and builds the backing tree directly: basic lists and vectors are
+packed into chunks in bulk, containers and lists of composite elements are assembled from the subtrees of
+their elements. Only the resulting tree is kept, not the encoding it was read from.
+"""
+import io
+import mmap
+from typing import BinaryIO, List as PyList, Optional, Type, TypeVar
+
+from remerkleable.basic import BasicView, boolean, uint256
+from remerkleable.byte_arrays import ByteVector
+from remerkleable.complex import Container, List, MonoSubtreeView
+from remerkleable.core import View, pack_bytes_to_chunks
+from remerkleable.tree import Node, PairNode, subtree_fill_to_contents
+
+V = TypeVar('V', bound=View)
+
+OFFSET_BYTE_LENGTH = 4
+
+# The stream identifier chunk that starts the snappy framing format
+SNAPPY_STREAM_IDENTIFIER = b'\xff\x06\x00\x00sNaPpY'
+SNAPPY_READ_SIZE = 2**16
+
+
+def read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError(f"stream ended after {len(data)} of {size} bytes")
+    return data
+
+
+def read_offset(stream: BinaryIO) -> int:
+    return int.from_bytes(read_exact(stream, OFFSET_BYTE_LENGTH), 'little')
+
+
+def check_size(typ: Type[View], size: int) -> None:
+    if not (typ.min_byte_length() <= size <= typ.max_byte_length()):
+        raise ValueError(f"size {size} out of bounds for {typ.type_repr()}: "
+                         f"[{typ.min_byte_length()}, {typ.max_byte_length()}]")
+
+
+def read_scope(stream: BinaryIO, scope: Optional[int]) -> bytes:
+    return stream.read() if scope is None else read_exact(stream, scope)
+
+
+def deserialize_sequence_backing(typ: Type[MonoSubtreeView], stream: BinaryIO, scope: Optional[int]) -> Node:
+    """
+    Return the backing of a list or vector of ``scope`` bytes, to the end of ``stream`` if ``scope`` is ``None``.
+    """
+    elem_cls = typ.element_cls()
+    is_list = issubclass(typ, List)
+    depth = typ.contents_depth() if is_list else typ.tree_depth()
+    # Basic values are packed into chunks, and a 32-byte vector is a chunk
+    if issubclass(elem_cls, BasicView) or (issubclass(elem_cls, ByteVector) and elem_cls.type_byte_length() == 32):
+        data = read_scope(stream, scope)
+        elem_size = elem_cls.type_byte_length()
+        if len(data) % elem_size != 0:
+            raise ValueError(f"scope {len(data)} is not a multiple of element byte length {elem_size}")
+        count = len(data) // elem_size
+        if issubclass(elem_cls, boolean) and data.translate(None, b'\x00\x01'):
+            raise ValueError("invalid boolean value")
+        nodes = pack_bytes_to_chunks(data)
+    elif elem_cls.is_fixed_byte_length():
+        elem_size = elem_cls.type_byte_length()
+        if scope is None:
+            nodes = []
+            while True:
+                data = stream.read(elem_size)
+                if not data:
+                    break
+                if len(data) != elem_size:
+                    raise ValueError(f"stream ended within an element of {elem_size} bytes")
+                nodes.append(deserialize_backing(elem_cls, io.BytesIO(data), elem_size))
+        else:
+            if scope % elem_size != 0:
+                raise ValueError(f"scope {scope} is not a multiple of element byte length {elem_size}")
+            nodes = [deserialize_backing(elem_cls, stream, elem_size) for _ in range(scope // elem_size)]
+        count = len(nodes)
+    elif scope is None:
+        # The number of elements is only known from the offsets, the sizes from the end of the stream
+        data = stream.read()
+        return deserialize_sequence_backing(typ, io.BytesIO(data), len(data))
+    else:
+        nodes = []
+        if scope != 0:
+            first_offset = read_offset(stream)
+            if first_offset % OFFSET_BYTE_LENGTH != 0 or first_offset > scope:
+                raise ValueError(f"invalid first offset {first_offset}")
+            offsets = [first_offset] + [read_offset(stream) for _ in range(first_offset // OFFSET_BYTE_LENGTH - 1)]
+            offsets.append(scope)
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                if end < start:
+                    raise ValueError(f"offset {start} is larger than next offset {end}")
+                check_size(elem_cls, end - start)
+                nodes.append(deserialize_backing(elem_cls, stream, end - start))
+        count = len(nodes)
+    if not typ.is_valid_count(count):
+        raise ValueError(f"count {count} is invalid for {typ.type_repr()}")
+    contents = subtree_fill_to_contents(nodes, depth)
+    return PairNode(contents, uint256(count).get_backing()) if is_list else contents
+
+
+def deserialize_container_backing(typ: Type[Container], stream: BinaryIO, scope: Optional[int]) -> Node:
+    nodes: PyList[Optional[Node]] = []
+    dynamic_fields = []
+    fixed_size = 0
+    for field_type in typ.fields().values():
+        if field_type.is_fixed_byte_length():
+            field_size = field_type.type_byte_length()
+            nodes.append(deserialize_backing(field_type, stream, field_size))
+            fixed_size += field_size
+        else:
+            dynamic_fields.append((len(nodes), field_type, read_offset(stream)))
+            nodes.append(None)
+            fixed_size += OFFSET_BYTE_LENGTH
+    if dynamic_fields and dynamic_fields[0][2] != fixed_size:
+        raise ValueError(f"first offset {dynamic_fields[0][2]} does not match fixed size {fixed_size}")
+    for i, (position, field_type, offset) in enumerate(dynamic_fields):
+        next_offset = dynamic_fields[i + 1][2] if i + 1 < len(dynamic_fields) else scope
+        field_size = None
+        if next_offset is not None:
+            if offset > next_offset:
+                raise ValueError(f"offset {offset} is larger than next offset {next_offset}")
+            field_size = next_offset - offset
+            check_size(field_type, field_size)
+        nodes[position] = deserialize_backing(field_type, stream, field_size)
+    return subtree_fill_to_contents(nodes, typ.tree_depth())
+
+
+def deserialize_backing(typ: Type[View], stream: BinaryIO, scope: Optional[int]) -> Node:
+    """
+    Return the backing of the ``typ`` value encoded in the next ``scope`` bytes of ``stream``,
+    or in the rest of ``stream`` if ``scope`` is ``None``.
+    """
+    if issubclass(typ, Container):
+        return deserialize_container_backing(typ, stream, scope)
+    if issubclass(typ, MonoSubtreeView):
+        return deserialize_sequence_backing(typ, stream, scope)
+    # Basic values, byte arrays, bitfields and unions are read in bulk by remerkleable
+    data = read_scope(stream, scope)
+    return typ.deserialize(io.BytesIO(data), len(data)).get_backing()
+
+
+def deserialize_stream(typ: Type[V], stream: BinaryIO, scope: Optional[int] = None) -> V:
+    """
+    Decode a ``typ`` value from the next ``scope`` bytes of ``stream``, or from the rest of ``stream``.
+    """
+    if scope is not None:
+        check_size(typ, scope)
+    return typ.view_from_backing(deserialize_backing(typ, stream, scope))
+
+
+def decode_file(typ: Type[V], path: str) -> V:
+    """
+    Decode a ``typ`` value from an SSZ file, read through a memory map.
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, io.SEEK_END)
+        if size == 0:
+            return deserialize_stream(typ, io.BytesIO(b''), 0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return deserialize_stream(typ, mapped, size)
+
+
+class SnappyFrameReader(io.RawIOBase):
+    """
+    Binary stream of the data of a file object in the snappy framing format, decompressed one frame at a time.
+    """
+
+    def __init__(self, raw: BinaryIO) -> None:
+        from snappy import StreamDecompressor
+
+        self.raw = raw
+        self.decompressor = StreamDecompressor()
+        self.buffer = b''
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, output: bytearray) -> int:
+        while self.position == len(self.buffer):
+            compressed = self.raw.read(SNAPPY_READ_SIZE)
+            if not compressed:
+                self.decompressor.flush()
+                return 0
+            self.buffer = self.decompressor.decompress(compressed)
+            self.position = 0
+        size = min(len(output), len(self.buffer) - self.position)
+        output[:size] = self.buffer[self.position:self.position + size]
+        self.position += size
+        return size
+
+
+def decode_snappy_file(typ: Type[V], path: str) -> V:
+    """
+    Decode a ``typ`` value from a snappy-compressed SSZ file, like the ``.ssz_snappy`` files of the test vectors.
+
+    Files in the snappy framing format are decompressed frame by frame while decoding. The test vectors are
+    single snappy blocks, which cannot be decompressed in parts: the block is decompressed at once from
+    a memory map of the file, and decoded without a further copy.
+    """
+    from snappy import uncompress
+
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPPY_STREAM_IDENTIFIER)) == SNAPPY_STREAM_IDENTIFIER:
+            f.seek(0)
+            return deserialize_stream(typ, io.BufferedReader(SnappyFrameReader(f)))
+        f.seek(0)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = uncompress(mapped)
+    return deserialize_stream(typ, io.BytesIO(data), len(data))
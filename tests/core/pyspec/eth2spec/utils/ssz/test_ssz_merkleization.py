@@ -0,0 +1,84 @@
+from random import Random
+
+from .ssz_impl import hash_tree_root, use_batched_merkleization, use_remerkleable_merkleization
+from .ssz_merkleization import batched_merkle_root, hash_pairs
+from .ssz_typing import Bytes32, Container, List, Vector, uint8, uint64
+
+
+class Record(Container):
+    key: Bytes32
+    value: uint64
+    flags: Vector[uint8, 3]
+
+
+class Registry(Container):
+    records: List[Record, 2**16]
+    balances: List[uint64, 2**20]
+    slot: uint64
+
+
+def build_registry(rng, count):
+    return Registry(
+        records=[Record(key=rng.randbytes(32), value=rng.randrange(2**64)) for _ in range(count)],
+        balances=[rng.randrange(2**64) for _ in range(count)],
+        slot=rng.randrange(2**64),
+    )
+
+
+def reference_root(registry):
+    # A new tree from the serialization, with no root computed yet
+    return Registry.decode_bytes(registry.encode_bytes()).get_backing().merkle_root()
+
+
+def test_batched_merkle_root_new_tree():
+    rng = Random(2023)
+    for count in (0, 1, 3, 100, 1000):
+        registry = build_registry(rng, count)
+        assert batched_merkle_root(registry.get_backing()) == reference_root(registry)
+
+
+def test_batched_merkle_root_dirty_subtrees():
+    rng = Random(2024)
+    registry = build_registry(rng, 1000)
+    batched_merkle_root(registry.get_backing())
+    for _ in range(10):
+        for index in rng.sample(range(1000), 50):
+            registry.balances[index] = rng.randrange(2**64)
+            registry.records[index].flags[rng.randrange(3)] = rng.randrange(256)
+        registry.records.append(Record(value=rng.randrange(2**64)))
+        registry.balances.append(rng.randrange(2**64))
+        assert batched_merkle_root(registry.get_backing()) == reference_root(registry)
+
+
+def test_batched_merkle_root_shared_subtrees():
+    record = Record(key=b'\x01' * 32, value=2)
+    registry = Registry(records=[record] * 500, balances=[3] * 500)
+    assert batched_merkle_root(registry.get_backing()) == reference_root(registry)
+
+
+def test_batched_merkle_root_hashes_by_level():
+    rng = Random(2025)
+    registry = build_registry(rng, 100)
+    calls = []
+
+    def hasher(data):
+        calls.append(len(data))
+        return hash_pairs(data)
+
+    root = batched_merkle_root(registry.get_backing(), hasher)
+    assert root == reference_root(registry)
+    # One call per level of the tree: the fields of the registry, the length mix-in of the records,
+    # the records and the fields of a record
+    depth = 2 + 1 + registry.records.contents_depth() + 2
+    assert len(calls) == depth
+
+
+def test_hash_tree_root_engines():
+    rng = Random(2026)
+    registry = build_registry(rng, 200)
+    try:
+        use_batched_merkleization()
+        assert hash_tree_root(registry.copy()) == reference_root(registry)
+    finally:
+        use_remerkleable_merkleization()
+    assert hash_tree_root(registry) == reference_root(registry)
@@ -0,0 +1,104 @@
+import io
+from functools import lru_cache
+from inspect import getmembers, isclass
+from random import Random
+
+import pytest
+
+from eth2spec.debug.random_value import RandomizationMode, get_random_ssz_object
+from eth2spec.test.context import spec_targets
+from eth2spec.test.helpers.constants import MINIMAL, TESTGEN_FORKS
+from .ssz_stream import decode_file, decode_snappy_file, deserialize_stream
+from .ssz_typing import Bitlist, Container, List, Vector, boolean, uint16, uint64
+
+# As in the ssz_static test generator
+MAX_BYTES_LENGTH = 1000
+MAX_LIST_LENGTH = 10
+SETTINGS = [(mode, False) for mode in RandomizationMode] + [(RandomizationMode.mode_random, True)]
+
+
+class Record(Container):
+    value: uint16
+    bits: Bitlist[20]
+    values: List[uint64, 16]
+
+
+class Records(Container):
+    flags: Vector[boolean, 3]
+    records: List[Record, 8]
+    nested: List[List[uint16, 4], 4]
+
+
+@lru_cache(maxsize=None)
+def get_ssz_static_values():
+    """
+    Return values like those of the ssz_static test vectors: of every container of every fork, in every mode.
+    """
+    values = []
+    for fork in TESTGEN_FORKS:
+        spec = spec_targets[MINIMAL][fork]
+        types = [value for _, value in getmembers(spec, isclass) if issubclass(value, Container) and value != Container]
+        for i, typ in enumerate(types):
+            rng = Random(i)
+            for mode, chaos in SETTINGS:
+                values.append((typ, get_random_ssz_object(rng, typ, MAX_BYTES_LENGTH, MAX_LIST_LENGTH, mode, chaos)))
+    return values
+
+
+def assert_decoded(typ, decoded, encoded):
+    expected = typ.decode_bytes(encoded)
+    assert decoded.encode_bytes() == encoded
+    assert decoded.hash_tree_root() == expected.hash_tree_root()
+
+
+def test_deserialize_stream_ssz_static():
+    for typ, value in get_ssz_static_values():
+        encoded = value.encode_bytes()
+        assert_decoded(typ, deserialize_stream(typ, io.BytesIO(encoded), len(encoded)), encoded)
+        # To the end of the stream
+        assert_decoded(typ, deserialize_stream(typ, io.BytesIO(encoded)), encoded)
+
+
+def test_deserialize_stream_invalid():
+    value = Records(
+        flags=[True, False, True],
+        records=[Record(value=1, bits=[True] * 5, values=[2, 3]), Record(value=4)],
+        nested=[[1, 2], [], [3]],
+    )
+    encoded = value.encode_bytes()
+    assert_decoded(Records, deserialize_stream(Records, io.BytesIO(encoded), len(encoded)), encoded)
+    invalid_encodings = [
+        # Truncated
+        encoded[:-1],
+        # A boolean out of range, which remerkleable accepts in a vector
+        b'\x02' + encoded[1:],
+        # An offset past the end
+        encoded[:3] + (len(encoded) + 1).to_bytes(4, 'little') + encoded[7:],
+        # Trailing bytes in the last list of uint16
+        encoded + b'\x00',
+    ]
+    for invalid in invalid_encodings:
+        with pytest.raises(ValueError):
+            deserialize_stream(Records, io.BytesIO(invalid), len(invalid))
+
+
+def test_decode_file(tmp_path):
+    for i, (typ, value) in enumerate(get_ssz_static_values()):
+        path = tmp_path / f'{i}.ssz'
+        path.write_bytes(value.encode_bytes())
+        assert_decoded(typ, decode_file(typ, str(path)), value.encode_bytes())
+
+
+def test_decode_snappy_file(tmp_path):
+    snappy = pytest.importorskip("snappy")
+    for i, (typ, value) in enumerate(get_ssz_static_values()):
+        encoded = value.encode_bytes()
+        # The test vectors are single snappy blocks
+        block_path = tmp_path / f'{i}.ssz_snappy'
+        block_path.write_bytes(snappy.compress(encoded))
+        assert_decoded(typ, decode_snappy_file(typ, str(block_path)), encoded)
+        # The framing format
+        framed_path = tmp_path / f'{i}.framed'
+        with framed_path.open('wb') as f:
+            snappy.stream_compress(io.BytesIO(encoded), f)
+        assert_decoded(typ, decode_snappy_file(typ, str(framed_path)), encoded)
@@ -0,0 +1,78 @@
+from random import Random
+
+import numpy as np
+
+from .packed_array import read_packed_array, write_packed_array
+from .ssz.ssz_typing import Bytes32, Container, List, Vector, uint8, uint64
+
+
+class Registry(Container):
+    balances: List[uint64, 2**20]
+    flags: List[uint8, 2**20]
+    mixes: Vector[Bytes32, 64]
+
+
+def build_registry(rng, count):
+    return Registry(
+        balances=[rng.randrange(2**64) for _ in range(count)],
+        flags=[rng.randrange(2**8) for _ in range(count)],
+        mixes=[rng.randbytes(32) for _ in range(64)],
+    )
+
+
+def fresh_root(registry):
+    return Registry.decode_bytes(registry.encode_bytes()).hash_tree_root()
+
+
+def test_read_packed_array():
+    rng = Random(2024)
+    registry = build_registry(rng, 1001)
+    balances = read_packed_array(registry.balances)
+    assert balances.dtype == np.dtype('<u8')
+    assert balances.tolist() == [int(balance) for balance in registry.balances]
+    assert read_packed_array(registry.flags).tolist() == [int(flag) for flag in registry.flags]
+    mixes = read_packed_array(registry.mixes)
+    assert mixes.shape == (64, 32)
+    assert [bytes(row) for row in mixes] == [bytes(mix) for mix in registry.mixes]
+    assert not balances.flags.writeable
+    assert len(read_packed_array(Registry().balances)) == 0
+
+
+def test_write_packed_array_changed_chunks():
+    rng = Random(2025)
+    registry = build_registry(rng, 1001)
+    registry.hash_tree_root()
+    balances = read_packed_array(registry.balances).copy()
+    flags = read_packed_array(registry.flags).copy()
+    mixes = read_packed_array(registry.mixes).copy()
+    for index in rng.sample(range(1001), 20):
+        balances[index] = rng.randrange(2**64)
+        flags[index] ^= 1
+    mixes[rng.randrange(64)] = np.frombuffer(rng.randbytes(32), dtype=np.uint8)
+    # The last chunk of balances, only partly filled
+    balances[1000] = 1
+
+    balances_backing = registry.balances.get_backing()
+    write_packed_array(registry.balances, balances)
+    write_packed_array(registry.flags, flags)
+    write_packed_array(registry.mixes, mixes)
+    assert [int(balance) for balance in registry.balances] == balances.tolist()
+    assert [int(flag) for flag in registry.flags] == flags.tolist()
+    assert [bytes(mix) for mix in registry.mixes] == [bytes(row) for row in mixes]
+    assert registry.hash_tree_root() == fresh_root(registry)
+    # Unchanged subtrees are kept
+    assert registry.balances.get_backing().get_right() is balances_backing.get_right()
+
+    backing = registry.get_backing()
+    write_packed_array(registry.balances, balances)
+    assert registry.get_backing() is backing
+
+
+def test_write_packed_array_resized():
+    rng = Random(2026)
+    registry = build_registry(rng, 100)
+    for count in (0, 7, 257):
+        balances = np.array([rng.randrange(2**64) for _ in range(count)], dtype=np.uint64)
+        write_packed_array(registry.balances, balances)
+        assert read_packed_array(registry.balances).tolist() == balances.tolist()
+        assert registry.hash_tree_root() == fresh_root(registry)
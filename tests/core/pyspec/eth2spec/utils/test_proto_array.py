@@ -0,0 +1,154 @@
+from random import Random
+
+from .proto_array import ProtoArray, ProtoArrayForkChoice, VoteTracker
+
+
+def build_random_tree(rng, block_count):
+    proto_array = ProtoArray()
+    parents = {}
+    slots = {}
+    for i in range(block_count):
+        root = i.to_bytes(32, 'little')
+        parent_root = rng.choice(list(slots.keys())[-8:]) if slots else b''
+        slots[root] = slots[parent_root] + rng.randint(1, 3) if slots else 5
+        parents[root] = parent_root
+        proto_array.on_block(root, parent_root, slots[root])
+    return proto_array, parents, slots
+
+
+def naive_get_ancestor(parents, slots, root, slot):
+    while slots[root] > slot:
+        root = parents[root]
+        if root not in slots:
+            return None
+    return root
+
+
+def test_get_ancestor():
+    rng = Random(1234)
+    proto_array, parents, slots = build_random_tree(rng, 500)
+    for root in slots:
+        for slot in range(0, slots[root] + 2):
+            assert proto_array.get_ancestor(root, slot) == naive_get_ancestor(parents, slots, root, slot)
+
+
+def test_apply_score_changes():
+    rng = Random(5678)
+    proto_array, parents, slots = build_random_tree(rng, 200)
+    votes = {root: rng.randint(0, 100) for root in rng.sample(list(slots.keys()), 50)}
+    proto_array.apply_score_changes(votes)
+    for root in slots:
+        expected = sum(
+            weight for vote, weight in votes.items()
+            if naive_get_ancestor(parents, slots, vote, slots[root]) == root
+        )
+        assert proto_array.get_weight(root) == expected
+
+
+def test_vote_tracker():
+    rng = Random(9012)
+    proto_array, parents, slots = build_random_tree(rng, 100)
+    vote_tracker = VoteTracker()
+    roots = list(slots.keys())
+    votes = {}
+    equivocating = set()
+    balances = [0] * 64
+    for step in range(200):
+        if step % 50 == 0:
+            balances = [rng.randint(0, 32) for _ in range(64)]
+            vote_tracker.update_balances(balances)
+        validator_index = rng.randrange(64)
+        if rng.random() < 0.05:
+            equivocating.add(validator_index)
+            vote_tracker.process_equivocation(validator_index)
+        else:
+            root = rng.choice(roots)
+            if validator_index not in equivocating:
+                votes[validator_index] = root
+            vote_tracker.process_vote(validator_index, root)
+        proto_array.apply_score_changes(vote_tracker.pop_deltas())
+
+    for root in slots:
+        expected = sum(
+            balances[i] for i, vote in votes.items()
+            if i not in equivocating and naive_get_ancestor(parents, slots, vote, slots[root]) == root
+        )
+        assert proto_array.get_weight(root) == expected
+
+
+def test_prune():
+    rng = Random(7890)
+    proto_array, parents, slots = build_random_tree(rng, 300)
+    roots = list(slots.keys())
+    finalized_root = naive_get_ancestor(parents, slots, roots[-1], slots[roots[150]])
+    descendants = {
+        root for root in roots
+        if naive_get_ancestor(parents, slots, root, slots[finalized_root]) == finalized_root
+    }
+    assert 1 < len(descendants) < len(roots)
+    pruned = proto_array.prune(finalized_root)
+    assert set(pruned) == set(roots) - descendants
+    assert len(proto_array) == len(descendants)
+
+    # Deltas for pruned blocks are ignored
+    votes = {root: rng.randint(0, 100) for root in rng.sample(roots, 100)}
+    proto_array.apply_score_changes(votes)
+    for root in descendants:
+        for slot in range(slots[finalized_root], slots[root] + 2):
+            assert proto_array.get_ancestor(root, slot) == naive_get_ancestor(parents, slots, root, slot)
+        expected = sum(
+            weight for vote, weight in votes.items()
+            if vote in descendants and naive_get_ancestor(parents, slots, vote, slots[root]) == root
+        )
+        assert proto_array.get_weight(root) == expected
+    assert proto_array.get_ancestor(finalized_root, slots[finalized_root] - 1) is None
+
+    # New blocks are added on top of the pruned tree
+    parent_root = max(descendants, key=lambda root: slots[root])
+    proto_array.on_block(b'\xff' * 32, parent_root, slots[parent_root] + 1)
+    assert proto_array.get_ancestor(b'\xff' * 32, slots[finalized_root]) == finalized_root
+
+
+def naive_filter_block_tree(parents, root, is_viable_leaf):
+    children = [child for child, parent in parents.items() if parent == root]
+    if len(children) == 0:
+        return [root] if is_viable_leaf(root) else []
+    filtered = [block for child in children for block in naive_filter_block_tree(parents, child, is_viable_leaf)]
+    return filtered + [root] if len(filtered) > 0 else []
+
+
+def test_get_filtered_block_tree():
+    rng = Random(3456)
+    proto_array, parents, slots = build_random_tree(rng, 200)
+    viable_leaves = set(rng.sample(list(slots.keys()), 100))
+    for justified_root in rng.sample(list(slots.keys()), 20):
+        filtered = proto_array.get_filtered_block_tree(justified_root, viable_leaves.__contains__)
+        assert set(filtered) == set(naive_filter_block_tree(parents, justified_root, viable_leaves.__contains__))
+
+
+def test_leaf_viability_cache():
+    fork_choice = ProtoArrayForkChoice()
+    roots = [i.to_bytes(32, 'little') for i in range(3)]
+    fork_choice.on_block(roots[0], b'', 0)
+    fork_choice.on_block(roots[1], roots[0], 1)
+    calls = []
+
+    def is_viable_leaf(root):
+        calls.append(root)
+        return True
+
+    fork_choice.update_viability_context(1)
+    assert fork_choice.find_head(roots[0], is_viable_leaf) == roots[1]
+    assert fork_choice.find_head(roots[0], is_viable_leaf) == roots[1]
+    assert calls == [roots[1]]
+
+    # The new block is a leaf, its parent is not anymore
+    fork_choice.on_block(roots[2], roots[1], 2)
+    assert fork_choice.find_head(roots[0], is_viable_leaf) == roots[2]
+    assert calls == [roots[1], roots[2]]
+    assert roots[1] not in fork_choice.leaf_viability
+
+    # A new context invalidates the cached viability
+    fork_choice.update_viability_context(2)
+    assert fork_choice.get_filtered_block_tree(roots[0], is_viable_leaf) == roots
+    assert calls == [roots[1], roots[2], roots[2]]
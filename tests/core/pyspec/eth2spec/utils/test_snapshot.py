@@ -0,0 +1,53 @@
+from .snapshot import get_memory_report, get_sharing_stats, snapshot
+from .ssz.ssz_typing import Container, List, uint64
+
+
+class Registry(Container):
+    balances: List[uint64, 2**20]
+    slot: uint64
+
+
+def build_registry(count):
+    return Registry(balances=[uint64(i) for i in range(count)], slot=uint64(1))
+
+
+def test_snapshot_shares_everything():
+    registry = build_registry(1000)
+    registry_snapshot = snapshot(registry)
+    stats = registry_snapshot.get_stats()
+    assert stats.unique_nodes == 0
+    assert stats.shared_fraction == 1.0
+    assert registry_snapshot.view == registry
+
+
+def test_snapshot_changes_are_unique():
+    registry = build_registry(1000)
+    registry_snapshot = snapshot(registry)
+    registry_snapshot.view.balances[3] = 42
+    stats = registry_snapshot.get_stats()
+    # The changed chunk, and the path to it from the container root through the length mix-in
+    assert stats.unique_nodes == registry.balances.contents_depth() + 3
+    assert 0 < stats.unique_bytes < stats.shared_bytes
+    # The origin is unaffected by the snapshot
+    assert registry.balances[3] == 3
+
+
+def test_deep_copy_is_detected():
+    registry = build_registry(1000)
+    deep_copy = Registry.decode_bytes(registry.encode_bytes())
+    stats = get_sharing_stats(deep_copy, registry)
+    assert deep_copy == registry
+    # Only the zero padding of the tree is still shared
+    assert stats.shared_fraction < 0.1
+
+
+def test_memory_report():
+    registries = [build_registry(1000)]
+    for slot in range(2, 5):
+        registries.append(registries[-1].copy())
+        registries[-1].slot = slot
+    report = get_memory_report({'first': registries[:1], 'others': registries[1:]})
+    assert report['first'].shared_nodes == 0
+    assert report['others'].total_nodes == 3 * report['first'].total_nodes
+    assert report['others'].unique_bytes < report['first'].unique_bytes
+    assert report['total'].unique_bytes == report['first'].unique_bytes + report['others'].unique_bytes
@@ -0,0 +1,97 @@
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from remerkleable.core import View
+from remerkleable.readonly_iters import NodeIter
+from remerkleable.tree import Node
+
+from .active_balance import (
+    EFFECTIVE_BALANCE_GINDEX,
+    RegistryIndex,
+    is_validator,
+    iter_list_changes,
+    read_uint64,
+)
+
+# Chunks of the validator fields the candidates depend on, in the depth 3 tree of a validator
+WITHDRAWAL_CREDENTIALS_GINDEX = 2**3 + 1
+WITHDRAWABLE_EPOCH_GINDEX = 2**3 + 7
+
+# Balances are packed by 4 in a chunk
+BALANCES_PER_CHUNK = 4
+
+
+def iter_sweep_candidates(candidates: Sequence[int], start: int, bound: int,
+                          validator_count: int) -> Iterator[int]:
+    """
+    Iterate over ``candidates``, sorted validator indices, in the order of a sweep over ``bound`` validators
+    from ``start`` that wraps around at ``validator_count``.
+    """
+    # Plain ints, as the sweep end may be past ``validator_count`` or short of it
+    start, bound, validator_count = int(start), int(bound), int(validator_count)
+    end = start + bound
+    for index in candidates[bisect_left(candidates, start):]:
+        if index >= end:
+            return
+        yield index
+    for index in candidates:
+        if index >= end - validator_count:
+            return
+        yield index
+
+
+class WithdrawalCandidateIndex(RegistryIndex):
+    """
+    Sorted indices of the validators that may be withdrawable, by registry and balances.
+
+    A candidate has an eth1 withdrawal credential and either a balance and a withdrawable epoch,
+    or the maximum effective balance and an excess balance. Whether the withdrawable epoch has passed is left to
+    the sweep, which checks every candidate in full. Validators of a changed balance chunk are read again too.
+    """
+
+    def __init__(self, far_future_epoch: int, max_effective_balance: int, withdrawal_prefix: bytes,
+                 cache_size: int = 16) -> None:
+        super().__init__(cache_size, latest_size=1)
+        self.far_future_epoch = far_future_epoch
+        self.max_effective_balance = max_effective_balance
+        self.withdrawal_prefix = withdrawal_prefix
+
+    def get_candidates(self, validators: View, balances: View) -> Sequence[int]:
+        return self.get_value((validators, balances), None)
+
+    def is_candidate(self, node: Node, balance: int) -> bool:
+        if not is_validator(node) or balance == 0:
+            return False
+        if node.getter(WITHDRAWAL_CREDENTIALS_GINDEX).root[:1] != self.withdrawal_prefix:
+            return False
+        if read_uint64(node, WITHDRAWABLE_EPOCH_GINDEX) != self.far_future_epoch:
+            return True
+        return (read_uint64(node, EFFECTIVE_BALANCE_GINDEX) == self.max_effective_balance
+                and balance > self.max_effective_balance)
+
+    def build(self, lists: Sequence[View], key: None) -> List[int]:
+        validators, balances = lists
+        nodes = NodeIter(validators.get_backing(), validators.tree_depth(), validators.length())
+        return [index for index, (node, balance) in enumerate(zip(nodes, balances))
+                if self.is_candidate(node, int(balance))]
+
+    def iter_changes(self, previous_backings: Sequence[Node], lists: Sequence[View]) -> Iterator[Tuple[int, Any]]:
+        yield from super().iter_changes(previous_backings, lists)
+        for chunk_index, _, _ in iter_list_changes(previous_backings[1], lists[1]):
+            for index in range(chunk_index * BALANCES_PER_CHUNK, (chunk_index + 1) * BALANCES_PER_CHUNK):
+                yield index, None
+
+    def update(self, candidates: List[int], changes: Dict[int, Any], lists: Sequence[View], key: None) -> List[int]:
+        validators, balances = lists
+        candidates = list(candidates)
+        validator_count = min(len(validators), len(balances))
+        for index in sorted(changes):
+            position = bisect_left(candidates, index)
+            was_candidate = position < len(candidates) and candidates[position] == index
+            is_candidate = index < validator_count and self.is_candidate(
+                validators[index].get_backing(), int(balances[index]))
+            if was_candidate and not is_candidate:
+                del candidates[position]
+            elif is_candidate and not was_candidate:
+                candidates.insert(position, index)
+        return candidates